@@ -1,4 +1,5 @@
 from flask import Flask, Blueprint
+from .cache import LRUCache
 
 mongo_api = Blueprint("mongo_api", __name__)
 from .routes import *
@@ -6,5 +7,8 @@ from .routes import *
 def create_app(config_class):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.extensions["artifact_deliverable_cache"] = LRUCache(
+            app.config.get("ARTIFACT_DELIVERABLE_CACHE_SIZE", 10000),
+            app.config.get("ARTIFACT_DELIVERABLE_CACHE_TTL", 60))
     app.register_blueprint(mongo_api)
     return app
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class LRUCache(object):
+    """
+    Thread-safe cache limited by number of entries and by their age
+    The least recently used entry is evicted when the size limit is reached
+    Clearing starts a new epoch, values computed in a previous epoch are not cached
+    """
+    def __init__(self, max_size, ttl, clock=time.monotonic):
+        """
+        :param max_size: maximum number of entries, zero disables caching
+        :param ttl: maximum age of an entry in seconds
+        :param clock: function returning current time in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.epoch = 0
+
+    def get(self, key):
+        """
+        Get a cached value
+        :param key: hashable key
+        :return: tuple (found, value, epoch), epoch is to be passed to 'put' for a value computed on miss
+        """
+        with self._lock:
+            _entry = self._entries.get(key)
+
+            if _entry is None:
+                self.misses += 1
+                return False, None, self.epoch
+
+            _expires, _value = _entry
+
+            if _expires <= self._clock():
+                del(self._entries[key])
+                self.expirations += 1
+                self.misses += 1
+                return False, None, self.epoch
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, _value, self.epoch
+
+    def put(self, key, value, epoch):
+        """
+        Cache a value, evicting the least recently used one if needed
+        :param key: hashable key
+        :param value: value to cache
+        :param epoch: epoch returned by 'get' before the value was computed,
+                      the value is dropped if the cache was cleared since then
+        """
+        if not self.max_size:
+            return
+
+        with self._lock:
+            if epoch != self.epoch:
+                return
+
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Invalidate all entries
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+            self.epoch += 1
+
+    def stats(self):
+        """
+        Get counters and limits
+        :return: dictionary
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations}
@@ -9,13 +9,24 @@ class Distributives(Document):
     client = StringField(required=True, default="")
     citype = StringField(required=True)
     version = StringField(required=True, unique_with=['client', 'citype'])
+    version_key = StringField()
     path = ListField(StringField(unique=True, sparse=True), unique=True, sparse=True)
     checksum = ListField(StringField(unique=True, sparse=True), unique=True, sparse=True)
     parent = ListField(ReferenceField('self'))
+    # natural keys of parents in the same order, so parents are rendered without dereferencing
+    parent_keys = ListField(DictField())
+    # number of distributives referencing this one as a parent
+    children_count = IntField(default=0)
+    # time of the last change of any field, unlike 'timestamp' which is for revisions only
+    modified = DateTimeField()
     artifact_deliverable = BooleanField(default=True)
     commentary = StringField()
     is_actual = BooleanField(default=True)
 
+    # normalized version key for versions ordering by database, see 'versions.version_key'
+    # 'parent' is indexed for walking from parents to children
+    meta = {'indexes': [('citype', 'client', 'version_key'), 'parent']}
+
 # History is now mandatory for 'artifact_deliverable' and 'commentary' fields
 # Others are out of interest
 class DistributivesRevisions(Document):
@@ -24,3 +35,25 @@ class DistributivesRevisions(Document):
     timestamp = DateTimeField(default=datetime.now())
     artifact_deliverable = BooleanField()
     commentary = StringField()
+
+    # history of a distributive is listed from the newest
+    meta = {'indexes': [('revision_of', '-timestamp', '-id')]}
+
+# Latest actual version for each citype-client pair
+# It is maintained by write requests, so no need to sort all versions of a citype on reading
+class DistributivesLatest(Document):
+    citype = StringField(required=True, unique_with=['client'])
+    client = StringField(required=True, default="")
+    version = StringField(required=True)
+    # the record is replaced by database only if a newer version key is written, see 'versions.version_key'
+    version_key = StringField()
+    path = ListField(StringField())
+    checksum = ListField(StringField())
+    distributive = ReferenceField('Distributives')
+
+# Change generation for each citype, and for all of them with empty citype
+# It is bumped by every write, so list requests are validated by reading a single document
+class DistributivesGenerations(Document):
+    citype = StringField(unique=True)
+    generation = IntField(default=0)
+    modified = DateTimeField()
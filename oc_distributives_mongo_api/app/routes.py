@@ -1,24 +1,47 @@
 import re
 import json
+import base64
+import binascii
+import itertools
+import functools
+import operator
+import hashlib
 from . import mongo_api
-from .dbmodels import Distributives, DistributivesRevisions
-from flask import Response, request
-from datetime import datetime
+from .dbmodels import Distributives, DistributivesRevisions, DistributivesLatest, DistributivesGenerations
+from .versions import version_key, parse_version
+from flask import Response, request, current_app
+from datetime import datetime, timezone, timedelta
 from mongoengine.errors import NotUniqueError, MultipleObjectsReturned, DoesNotExist
+from mongoengine.queryset.visitor import Q
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
 import logging
 from copy import deepcopy
-from packaging import version
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
 
 _distr_mandatory_fields = ["citype", "version", "path", "checksum"]
 _distr_search_fields = ["client"] + _distr_mandatory_fields
 _revision_mandatory_fields = ["artifact_deliverable", "commentary"]
 _revision_fields = ["revision", "timestamp"] + _revision_mandatory_fields
+_distr_sort_fields = ["citype", "version", "client", "revision", "timestamp", "artifact_deliverable", "children_count"]
+# internal fields are maintained by write requests and are not rendered
+_distr_internal_fields = ["parent_keys", "version_key", "modified"]
+_distr_fields = [_key for _key in Distributives._fields.keys() if _key not in ["id"] + _distr_internal_fields]
+_revision_output_fields = ["revision_of"] + _revision_fields
+_ndjson_mimetype = "application/x-ndjson"
+_stream_chunk_size = 500
+_lookup_max_values = 5000
+_global_generation = ""
+
+# parents keys of children are reconciled in background, one at a time
+_parent_keys_reconciler = ThreadPoolExecutor(max_workers=1)
 
 class DistributivesParentLoopError(Exception):
     def __init__ (self, distr_top, distr_to_check):
         super().__init__(f"""
-        ===searching===:\n{distr_top.to_json()}\n
-        ===found  in===:\n{distr_to_check.to_json()}
+        ===searching===:\n{_distr_to_json(distr_top)}\n
+        ===found  in===:\n{_distr_to_json(distr_to_check)}
         """)
 
 def response(code, data):
@@ -28,6 +51,105 @@ def response(code, data):
         response=data
     )
 
+def not_modified_response(etag, last_modified=None):
+    """
+    Tell the requestor its cached representation is still actual
+    :param etag: entity tag of the representation
+    :param last_modified: time of the last change, if known
+    """
+    return _set_cache_validators(Response(status=304), etag, last_modified)
+
+def _set_cache_validators(response, etag, last_modified=None):
+    """
+    Set cache validation headers for the response
+    :param etag: entity tag of the representation
+    :param last_modified: time of the last change, if known
+    :return: response
+    """
+    response.set_etag(etag)
+
+    if last_modified:
+        response.last_modified = last_modified
+
+    return response
+
+def _is_not_modified(etag, last_modified=None):
+    """
+    Check if the requestor has the actual representation already
+    'If-None-Match' takes precedence over 'If-Modified-Since'
+    HTTP dates have no fractions of a second, so the time within the current second is never trusted:
+    another change may follow in the same second, see '_cache_validators'
+    :param etag: entity tag of the representation
+    :param last_modified: time of the last change rounded to whole seconds, if known
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since \
+                and last_modified < datetime.now(timezone.utc).replace(microsecond=0)
+
+    return False
+
+def ndjson_response(code, values):
+    """
+    Stream values as newline-delimited JSON, one value per line
+    :param values: iterable of JSON-serializable values, may be a generator
+    """
+    return Response(
+        status=code,
+        mimetype=_ndjson_mimetype,
+        response=(json.dumps(_value) + "\n" for _value in values)
+    )
+
+def _wants_ndjson():
+    """
+    Check if the requestor prefers newline-delimited JSON stream
+    """
+    return request.accept_mimetypes.best_match(["application/json", _ndjson_mimetype]) == _ndjson_mimetype
+
+def _distr_etag(distr):
+    """
+    Make a strong entity tag for the distributive state
+    :param distr: raw document with '_id', 'revision', 'timestamp' and 'modified'
+    :return: entity tag string, not quoted
+    """
+    return hashlib.sha1(":".join(map(lambda x: str(distr.get(x)),
+        ["_id", "revision", "timestamp", "modified"])).encode("utf8")).hexdigest()
+
+def _bump_generations(citypes):
+    """
+    Bump change generations of citypes given and the global one with a single request
+    :param citypes: citypes changed
+    """
+    _now = datetime.now(timezone.utc)
+    DistributivesGenerations._get_collection().bulk_write([UpdateOne({"citype": _citype},
+        {"$inc": {"generation": 1}, "$set": {"modified": _now}}, upsert=True)
+        for _citype in set(filter(None, citypes)) | {_global_generation}], ordered=False)
+
+def _cache_validators(citypes=None):
+    """
+    Make cache validators for a list request from change generations, read by a single query
+    :param citypes: citypes the result depends on, None means all of them
+    :return: tuple (entity tag, last change time rounded up to whole seconds or None)
+    """
+    _keys = sorted(set(citypes)) if citypes else [_global_generation]
+    _generations = dict((_generation.get("citype"), _generation) for _generation in
+            DistributivesGenerations.objects(citype__in=_keys).as_pymongo())
+    _modified = list(filter(None, map(lambda x: x.get("modified"), _generations.values())))
+
+    # the same generations are for different results of different requests
+    _etag = hashlib.sha1(json.dumps([
+        request.path, request.args.to_dict(flat=False), request.get_json(silent=True), _wants_ndjson(),
+        list(map(lambda x: _generations.get(x, dict()).get("generation", 0), _keys))],
+        sort_keys=True).encode("utf8")).hexdigest()
+
+    if not _modified:
+        return _etag, None
+
+    # rounded up, so a change later in the same second is after it, but not later than now
+    return _etag, min(max(_modified).replace(tzinfo=timezone.utc, microsecond=0) + timedelta(seconds=1),
+            datetime.now(timezone.utc).replace(microsecond=0))
 
 def _distr_search_params(parms):
     """
@@ -43,6 +165,241 @@ def _distr_search_params(parms):
 
     return dict((_key,parms.get(_key)) for _key in _distr_search_fields if _key in parms)
 
+def _positive_int(value, name, zero_allowed=False):
+    """
+    Check the request parameter is a positive integer
+    :param value: value to check
+    :param name: parameter name for error message
+    :param zero_allowed: accept zero also
+    :return: the value
+    """
+    # 'bool' is a subclass of 'int' but it is not what the requestor means
+    if isinstance(value, bool) or not isinstance(value, int) or value < (0 if zero_allowed else 1):
+        raise ValueError(f"'{name}' should be a {'non-negative' if zero_allowed else 'positive'} integer, got: {value}")
+
+    return value
+
+def _sort_fields(sort):
+    """
+    Check and normalize sorting specification
+    :param sort: field name or list of field names, '-' prefix means descending order
+    :return: list of field names suitable for 'order_by'
+    """
+    if isinstance(sort, str):
+        sort = [sort]
+
+    if not isinstance(sort, list) or not sort:
+        raise ValueError(f"'sort' should be a field name or a list of field names, got: {sort}")
+
+    for _field in sort:
+        if not isinstance(_field, str) or _field.lstrip("+-") not in _distr_sort_fields:
+            raise ValueError(f"Sorting by '{_field}' is not supported, use one of: {_distr_sort_fields}")
+
+    return sort
+
+def _limit_queryset(queryset, count=None, skip=None, sort=None):
+    """
+    Apply sorting, skipping and limiting on database side
+    so only the requested documents are fetched
+    :param queryset: filtered queryset
+    :param count: maximum number of documents to return, None or zero means 'all'
+    :param skip: number of documents to skip
+    :param sort: sorting specification, see '_sort_fields'
+    :return: queryset
+    """
+    if sort is not None:
+        queryset = queryset.order_by(*_sort_fields(sort))
+
+    if skip:
+        queryset = queryset.skip(_positive_int(skip, "skip", zero_allowed=True))
+
+    if count:
+        queryset = queryset.limit(_positive_int(count, "count"))
+
+    return queryset
+
+def _encode_cursor(object_id):
+    """
+    Make an opaque pagination cursor from the last document returned
+    :param object_id: '_id' of the last document on the page
+    :type object_id: ObjectId
+    :return: cursor string
+    """
+    return base64.urlsafe_b64encode(str(object_id).encode("utf8")).decode("utf8")
+
+def _decode_cursor(cursor):
+    """
+    Restore the '_id' value from an opaque pagination cursor
+    :param cursor: cursor string given by previous page
+    :return: ObjectId
+    """
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor.encode("utf8")).decode("utf8"))
+    except (AttributeError, ValueError, binascii.Error, InvalidId) as _e:
+        raise ValueError(f"Incorrect cursor: {cursor}")
+
+def _paginate(queryset, page_size, cursor=None):
+    """
+    Keyset pagination by '_id': each page is a single bounded range scan of the primary index,
+    so there is no need to skip or materialize documents of previous pages
+    :param queryset: filtered queryset
+    :param page_size: maximum number of documents on a page
+    :param cursor: cursor returned with the previous page, None for the first one
+    :return: tuple (raw documents list, next page cursor or None if it was the last page)
+    """
+    if cursor:
+        queryset = queryset.filter(id__gt=_decode_cursor(cursor))
+
+    # one extra document tells us if there is something after this page
+    _page = list(queryset.order_by("id").limit(page_size + 1).as_pymongo())
+    _next_cursor = None
+
+    if len(_page) > page_size:
+        _page = _page[:page_size]
+        _next_cursor = _encode_cursor(_page[-1].get("_id"))
+
+    return _page, _next_cursor
+
+def _projection(fields, allowed_fields):
+    """
+    Check and normalize fields projection
+    :param fields: list of field names to return, or list of '-'-prefixed names to omit
+    :param allowed_fields: field names may be used
+    :return: tuple (fields to include, fields to exclude), one of them is always empty
+    """
+    if not fields:
+        return list(), list()
+
+    if not isinstance(fields, list):
+        raise ValueError(f"'fields' should be a list, got: {type(fields)}")
+
+    _include = list()
+    _exclude = list()
+
+    for _field in fields:
+        if not isinstance(_field, str) or _field.lstrip("-") not in allowed_fields:
+            raise ValueError(f"Unknown field '{_field}', use any of: {allowed_fields}")
+
+        if _field.startswith("-"):
+            _exclude.append(_field.lstrip("-"))
+        else:
+            _include.append(_field)
+
+    if _include and _exclude:
+        raise ValueError(f"Included and excluded fields can not be mixed: {fields}")
+
+    return _include, _exclude
+
+def _project_queryset(queryset, projection):
+    """
+    Apply fields projection on database side
+    :param queryset: queryset
+    :param projection: tuple (fields to include, fields to exclude)
+    :return: queryset
+    """
+    _include, _exclude = projection
+
+    # parents are rendered from their keys stored
+    if "parent" in _include:
+        _include = _include + ["parent_keys"]
+
+    if "parent" in _exclude:
+        _exclude = _exclude + ["parent_keys"]
+
+    if _include:
+        return queryset.only(*_include)
+
+    if _exclude:
+        return queryset.exclude(*_exclude)
+
+    return queryset
+
+def _project_output(out, projection):
+    """
+    Remove fields not requested from the output dictionary.
+    Needed for documents built in memory, raw ones are projected by database
+    :param out: document as dictionary
+    :param projection: tuple (fields to include, fields to exclude)
+    :return: dictionary
+    """
+    _include, _exclude = projection
+
+    if _include:
+        return dict((_key, _value) for _key, _value in out.items() if _key == "_id" or _key in _include)
+
+    if _exclude:
+        return dict((_key, _value) for _key, _value in out.items() if _key not in _exclude)
+
+    return out
+
+def _timestamp_param(value, name):
+    """
+    Check the request parameter is a timestamp
+    :param value: ISO 8601 string
+    :param name: parameter name for error message
+    :return: naive local datetime, the same as stored ones
+    """
+    try:
+        _result = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' should be an ISO 8601 timestamp, got: {value}")
+
+    # timestamps are written with 'datetime.now()', so offset is converted to local time
+    if _result.tzinfo is not None:
+        _result = _result.astimezone().replace(tzinfo=None)
+
+    return _result
+
+def _revisions_range_params(params):
+    """
+    Make search parameters for a range of revisions timestamps
+    :param params: dictionary which may have 'since' and 'until' values, both inclusive
+    :return: search parameters for 'timestamp'
+    """
+    _result = dict()
+
+    for _name, _operator in [("since", "gte"), ("until", "lte")]:
+        _value = params.get(_name)
+
+        if _value is None:
+            continue
+
+        _result[f"timestamp__{_operator}"] = _timestamp_param(_value, _name)
+
+    return _result
+
+def _in_revisions_range(timestamp, range_params):
+    """
+    Check the timestamp is within the range the same way as database does
+    :param timestamp: datetime
+    :param range_params: search parameters, see '_revisions_range_params'
+    """
+    return all([
+        "timestamp__gte" not in range_params or timestamp >= range_params.get("timestamp__gte"),
+        "timestamp__lte" not in range_params or timestamp <= range_params.get("timestamp__lte")])
+
+def _revisions_after(revisions, distr_id, cursor):
+    """
+    Filter revisions following the one the cursor points to, newest first
+    :param revisions: revisions queryset of the distributive
+    :param distr_id: distributive identifier, the cursor with it points to the current state
+    :param cursor: cursor returned with the previous page
+    :return: queryset
+    """
+    _last_id = _decode_cursor(cursor)
+
+    # the current state is newer than all revisions stored
+    if _last_id == distr_id:
+        return revisions
+
+    _last = DistributivesRevisions.objects(id=_last_id, revision_of=distr_id).only("timestamp").as_pymongo().first()
+
+    if not _last:
+        raise ValueError(f"Incorrect cursor: {cursor}")
+
+    _timestamp = _last.get("timestamp")
+    return revisions.filter(Q(timestamp__lt=_timestamp) | Q(timestamp=_timestamp, id__lt=_last_id))
+
 def _create_revision(distributive):
     """
     Create the distributive's revision
@@ -75,17 +432,29 @@ def _fix_distinct_search_params(params):
 
     return params
 
+def _find_parent(search_params):
+    """
+    Find a single parent, errors mean the parent is not found
+    :param search_params: parent search parameters
+    :return: raw document or None
+    """
+    try:
+        return _find_distributives([search_params]).pop()
+    except Exception as _e:
+        logging.debug(f"Parent search error: {search_params}: Error {type(_e)}: {_e}")
+        return None
+
 def _resolve_parents(parents):
     """
     Resolve all parents given and return a list of corresponding Distributives() objects
+    All parents are found with a single query, see '_find_distributives'
     :param parents: parents
     :type parents: list of dictionaries
     """
     if not parents:
         return list()
 
-    _result = list()
-
+    _search_params_list = list()
 
     for _parent in parents:
         # parents may be deleted already, but it is not the cause to ignore
@@ -103,92 +472,644 @@ def _resolve_parents(parents):
             logging.debug(f"No relevant search keywords found for parent: {_parent}")
             continue
 
-        try:
-            _distr = Distributives.objects.get(**_search_params)
-        except Exception as _e:
+        _search_params_list.append(_search_params)
+
+    try:
+        _found = _find_distributives(_search_params_list)
+    except Exception as _e:
+        # some of parameters are not acceptable by database, search one by one to skip those only
+        logging.debug(f"Parents search error: {_search_params_list}: Error {type(_e)}: {_e}")
+        _found = list(map(_find_parent, _search_params_list))
+
+    _result = dict()
+
+    for _search_params, _distr in zip(_search_params_list, _found):
+        if not _distr:
             # it is OK, skip this parent binding
-            logging.debug(f"Parent not found: {_parent}: Error {type(_e)}: {_e}")
+            logging.debug(f"Parent not found or found many times: {_search_params}")
             continue
 
-        if not _distr:
-            logging.debug(f"Parent search gives nothing: {_parent}")
+        # the same parent may be given several times
+        _result.setdefault(_distr.get("_id"), Distributives._from_son(_distr))
+
+    return list(_result.values())
+
+def _is_newer_version(version_to_check, version_current):
+    """
+    Compare versions
+    :param version_to_check: version string
+    :param version_current: version string
+    :return: True if 'version_to_check' is greater than 'version_current'
+    """
+    return parse_version(version_to_check) > parse_version(version_current)
+
+def _version_range_params(params):
+    """
+    Make search parameters for a range of versions, served by normalized version key index
+    :param params: dictionary which may have 'min_version', 'max_version' (both inclusive)
+                   and 'newer_than' (exclusive) values
+    :return: search parameters for 'version_key'
+    """
+    _result = dict()
+
+    for _name, _operator in [("min_version", "gte"), ("max_version", "lte"), ("newer_than", "gt")]:
+        _value = params.get(_name)
+
+        if _value is None:
             continue
 
-        logging.debug(f"Appending {_distr.to_json()}")
-        _result.append(_distr)
+        if not isinstance(_value, str) or not _value:
+            raise ValueError(f"'{_name}' should be a non-empty version string, got: {_value}")
+
+        _result[f"version_key__{_operator}"] = version_key(_value)
+
+    return _result
+
+def _rebuild_latest(citype, client):
+    """
+    Find the latest actual version for citype-client pair from scratch and save it
+    :param citype: citype
+    :param client: client, empty string for standard distributives
+    :return: DistributivesLatest record or None if there is no actual distributives
+    """
+    # index-ordered scan by normalized version key
+    _latest = Distributives.objects(citype=citype, client=client, is_actual=True).only(
+            "version", "version_key", "path", "checksum").order_by("-version_key").first()
+
+    if not _latest:
+        DistributivesLatest.objects(citype=citype, client=client).delete()
+        return None
+
+    return DistributivesLatest.objects(citype=citype, client=client).modify(
+            upsert=True, new=True,
+            set__version=_latest.version,
+            set__version_key=_latest.version_key,
+            set__path=_latest.path,
+            set__checksum=_latest.checksum,
+            set__distributive=_latest.id)
+
+def _update_latest(distr):
+    """
+    Maintain the latest actual version record incrementally after the distributive was saved
+    :param distr: distributive saved
+    :type distr: Distributives
+    """
+    _latest = DistributivesLatest.objects(citype=distr.citype, client=distr.client).no_dereference().first()
+    _is_latest = _latest is not None and _latest.distributive.id == distr.id
+
+    if not distr.is_actual:
+        # the latest one was deleted, the previous should be found
+        if _is_latest:
+            logging.debug(f"Latest version deleted: {distr.citype}:{distr.version}:{distr.client}")
+            _rebuild_latest(distr.citype, distr.client)
+
+        return
+
+    if _is_latest:
+        # the version is the same, so only the record of this distributive is refreshed
+        DistributivesLatest.objects(citype=distr.citype, client=distr.client, distributive=distr.id).update_one(
+                set__path=distr.path,
+                set__checksum=distr.checksum)
+        return
+
+    # concurrent writers are ordered by database: the record is replaced with a newer version only,
+    # records written before version keys were introduced are replaced also
+    try:
+        DistributivesLatest.objects(
+                Q(version_key__lt=distr.version_key) | Q(version_key__exists=False),
+                citype=distr.citype, client=distr.client).update_one(
+            upsert=True,
+            # filter is compound, so keys are not taken from it on insertion
+            set_on_insert__citype=distr.citype,
+            set_on_insert__client=distr.client,
+            set__version=distr.version,
+            set__version_key=distr.version_key,
+            set__path=distr.path,
+            set__checksum=distr.checksum,
+            set__distributive=distr.id)
+    except NotUniqueError:
+        # the record exists with the same or newer version
+        return
+
+    logging.debug(f"Latest version: {distr.citype}:{distr.version}:{distr.client}")
 
-    return list(set(_result))
+def _parent_keys(parents):
+    """
+    Make natural keys of parents to be stored next to references
+    :param parents: list of Distributives objects
+    :return: list of dictionaries, in the same order as parents
+    """
+    return [dict((_key, getattr(_parent, _key)) for _key in _distr_search_fields) for _parent in parents]
 
-def _check_parent_loop(distr_to_check, distr_top=None):
+def _rebuild_parent_keys(distrs):
+    """
+    Write actual parents keys for a batch of raw documents
+    All parents of the batch are fetched by a single query
+    :param distrs: list of raw documents with '_id', 'citype' and 'parent'
+    :return: number of documents updated
+    """
+    _resolved = _resolve_references(set(map(str, itertools.chain.from_iterable(
+        map(lambda x: x.get("parent") or list(), distrs)))))
+
+    # keys are aligned with references, parents removed completely are 'null'
+    # references are matched also, so keys computed for references changed concurrently are not written
+    _requests = [UpdateOne({"_id": _distr.get("_id"), "parent": _distr.get("parent")}, {"$set": {"modified": datetime.now(), "parent_keys": list(map(
+        lambda x: _resolved.get(str(x)), _distr.get("parent") or list()))}}) for _distr in distrs]
+
+    if not _requests:
+        return 0
+
+    _result = Distributives._get_collection().bulk_write(_requests, ordered=False).modified_count
+    _bump_generations(map(lambda x: x.get("citype"), distrs))
+    return _result
+
+def _reconcile_parent_keys(parent_id):
+    """
+    Rewrite parents keys of all children of the distributive changed
+    :param parent_id: '_id' of the distributive changed
+    """
+    _chunk = list()
+    _total = 0
+
+    for _child in Distributives.objects(parent=parent_id).only("citype", "parent").as_pymongo().no_cache():
+        _chunk.append(_child)
+
+        if len(_chunk) < _stream_chunk_size:
+            continue
+
+        _total += _rebuild_parent_keys(_chunk)
+        _chunk = list()
+
+    if _chunk:
+        _total += _rebuild_parent_keys(_chunk)
+
+    logging.debug(f"Parent keys reconciled for {_total} children of {parent_id}")
+
+def _reconcile_parent_keys_later(parent_id):
+    """
+    Schedule reconciliation of children parents keys, so the write request is not delayed by it
+    It is done immediately if 'PARENT_KEYS_RECONCILE_SYNC' is configured
+    :param parent_id: '_id' of the distributive changed
+    """
+    if current_app.config.get("PARENT_KEYS_RECONCILE_SYNC"):
+        _reconcile_parent_keys(parent_id)
+        return
+
+    def _log_error(future):
+        if future.exception():
+            logging.error(f"Parent keys reconciliation failed for {parent_id}: {future.exception()}")
+
+    _parent_keys_reconciler.submit(_reconcile_parent_keys, parent_id).add_done_callback(_log_error)
+
+def _parent_ids(distr):
+    """
+    Get parents identifiers of a distributive without dereferencing them
+    :param distr: Distributives object
+    :return: set of ObjectId
+    """
+    return set(distr.to_mongo().get("parent") or list())
+
+def _update_children_count(parent_ids_before, parent_ids_after):
+    """
+    Maintain children counters of parents after a distributive parents were set
+    :param parent_ids_before: set of parents identifiers before the change, empty for a new distributive
+    :param parent_ids_after: set of parents identifiers written
+    """
+    _added = parent_ids_after - parent_ids_before
+    _removed = parent_ids_before - parent_ids_after
+
+    if _added:
+        Distributives.objects(id__in=list(_added)).update(inc__children_count=1, set__modified=datetime.now())
+
+    if _removed:
+        Distributives.objects(id__in=list(_removed)).update(dec__children_count=1, set__modified=datetime.now())
+
+    if _added or _removed:
+        _bump_generations(Distributives.objects(id__in=list(_added | _removed)).distinct("citype"))
+
+def _check_parent_loop(distr_top):
     """
     Check if we have looped parents
-    :param distr_to_check: distr to check
-    :type distr_to_check: Distributives
-    :param distr_top: top-level distributive
+    The ancestry is walked breadth-first: one query per level, each distributive is fetched once
+    :param distr_top: top-level distributive, its parents may be not written to database yet
     :type distr_top: Distributives
     """
+    _top_key = (distr_top.citype, distr_top.version, distr_top.client)
+
+    _level = _parent_ids(distr_top)
+    _visited = set()
+
+    while _level:
+        _visited.update(_level)
+        _next_level = set()
+
+        for _parent in Distributives.objects(id__in=list(_level)).only(
+                "citype", "version", "client", "parent").as_pymongo():
+            # check equality by primary key
+            # since some changes in other fields
+            # may be not written to database yet
+            if (_parent.get("citype"), _parent.get("version"), _parent.get("client", "")) == _top_key:
+                raise DistributivesParentLoopError(Distributives._from_son(_parent), distr_top)
+
+            _next_level.update(_parent.get("parent") or list())
+
+        _level = _next_level - _visited
+
+def _bson_for_json(value):
+    """
+    Render raw BSON document values the same way MongoEngine 'to_json' does,
+    but without document objects construction and JSON encode-decode round trip
+    :param value: raw document or its value as returned by 'as_pymongo'
+    :return: JSON-serializable value
+    """
+    if isinstance(value, dict):
+        return dict((_key, _bson_for_json(_value)) for _key, _value in value.items())
+
+    if isinstance(value, list):
+        return list(map(_bson_for_json, value))
+
+    if isinstance(value, (ObjectId, datetime)):
+        return json_util.default(value, json_options=json_util.LEGACY_JSON_OPTIONS)
 
-    if not distr_top:
-        distr_top = distr_to_check
+    return value
+
+def _without_internal_fields(out):
+    """
+    Remove fields maintained by write requests from the output dictionary
+    :param out: dictionary of a distributive converted for output
+    :return: the same dictionary
+    """
+    for _key in _distr_internal_fields:
+        out.pop(_key, None)
 
-    for _parent in distr_to_check.parent:
-        # check equality by primary key 
-        # since some changes in other fields 
-        # may be not written to database yet
-        if all([_parent.citype == distr_top.citype,
-                _parent.version == distr_top.version,
-                _parent.client == distr_top.client]):
-            raise DistributivesParentLoopError(_parent, distr_top)
+    return out
 
-        _check_parent_loop(_parent, distr_top)
+def _distr_to_json(distr):
+    """
+    Render a distributive document the same way MongoEngine 'to_json' does, but without internal fields
+    :param distr: distributive
+    :type distr: Distributives
+    :return: JSON string
+    """
+    return json.dumps(_without_internal_fields(_bson_for_json(distr.to_mongo().to_dict())))
 
-def _distrs_list_for_json(distrs, count=None):
+def _resolve_references(object_ids):
+    """
+    Fetch the key fields for all referenced distributives with a single query
+    :param object_ids: identifiers of the distributives referenced
+    :type object_ids: set of str
+    :return: dictionary {identifier: {key fields}}
+    """
+    if not object_ids:
+        return dict()
+
+    _distrs = Distributives.objects(id__in=list(map(ObjectId, object_ids))).only(*_distr_search_fields).as_pymongo()
+
+    return dict((str(_distr.get("_id")), dict((_key, _distr.get(_key)) for _key in _distr_search_fields))
+            for _distr in _distrs)
+
+def _distrs_list_for_json(distrs):
     """
     Carefully and recursively convert a distributives or revisions set
     to output JSON for returning to requestor.
     Need this since 'parent' and 'revision_of' are returned as {"$oid": "_hash_"}
     This is useless in external tools
+    Raw documents are expected (see 'as_pymongo'), so no document objects are constructed.
+    All references of the set are resolved by one query after conversion,
+    fields not loaded with projection are not resolved at all
     """
     _result = list()
     _attrs_to_convert = ["revision_of", "parent"]
-    _counter = 0
+    _references = set()
 
     for _distr in distrs:
-        _out = json.loads(_distr.to_json())
+        _out = _bson_for_json(_distr)
+        _parent_keys = _out.get("parent_keys")
+        _out = _without_internal_fields(_out)
+        _attrs = _attrs_to_convert
+
+        # parents keys stored are used if they are aligned with references,
+        # those written before keys were introduced are resolved
+        if _parent_keys is not None and isinstance(_out.get("parent"), list) \
+                and len(_parent_keys) == len(_out.get("parent")):
+            _out["parent"] = list(filter(None, _parent_keys))
+            _attrs = ["revision_of"]
+
+        for _attr in _attrs:
+            _value = _out.get(_attr)
+
+            if not _value:
+                continue
+
+            if not isinstance(_value, list):
+                _value = [_value]
+
+            _references.update(map(lambda x: x.get("$oid"), _value))
+
+        _result.append((_out, _attrs))
+
+    _resolved = _resolve_references(_references)
 
-        for _attr in _attrs_to_convert:
-            try:
-                _value = getattr(_distr, _attr)
-            except AttributeError as _e:
-                logging.debug(f"Atrribute search error for {_distr.to_json()}: {_attr}")
+    for _out, _attrs in _result:
+        for _attr in _attrs:
+            if _attr not in _out:
                 continue
 
-            _is_list = isinstance(_value, list)
+            _value = _out.get(_attr)
+
+            if isinstance(_value, list):
+                _out[_attr] = [_resolved.get(_sub.get("$oid")) for _sub in _value if _sub.get("$oid") in _resolved]
+                continue
+
+            if _value:
+                _out[_attr] = _resolved.get(_value.get("$oid"))
+
+    return list(map(lambda x: x[0], _result))
+
+def _distrs_stream_for_json(distrs):
+    """
+    The same as '_distrs_list_for_json' but yields converted documents one by one.
+    The set is converted by chunks, so memory used does not depend on the set size
+    :param distrs: queryset
+    """
+    _chunk = list()
+
+    # documents should not be cached by queryset while streaming
+    for _distr in distrs.as_pymongo().no_cache():
+        _chunk.append(_distr)
+
+        if len(_chunk) < _stream_chunk_size:
+            continue
+
+        yield from _distrs_list_for_json(_chunk)
+        _chunk = list()
+
+    if _chunk:
+        yield from _distrs_list_for_json(_chunk)
+
+def _lookup_by_values(field, values):
+    """
+    Find actual distributives by many values of a multikey field with a single '$in' query
+    :param field: field to search by: 'path' or 'checksum'
+    :param values: values to search
+    :type values: list of str
+    :return: dictionary {value: distributive JSON}, values not found are absent
+    """
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"Non-empty list of '{field}' values expected, got: {type(values)}")
+
+    if len(values) > _lookup_max_values:
+        raise ValueError(f"Too many values: {len(values)}, not more than {_lookup_max_values} allowed")
+
+    if not all(map(lambda x: isinstance(x, str), values)):
+        raise ValueError(f"All '{field}' values should be strings")
+
+    _values = set(values)
+    _result = dict()
+    _search_params = {f"{field}__in": list(_values), "is_actual": True}
 
-            if _is_list:
-                _out[_attr] = list()
+    for _distr in _distrs_list_for_json(Distributives.objects(**_search_params).as_pymongo()):
+        for _value in _distr.get(field):
+            if _value in _values:
+                _result[_value] = _distr
+
+    return _result
+
+def _distr_matches(distr, search_params):
+    """
+    Check if raw document matches search parameters as database does
+    :param distr: raw document
+    :param search_params: search parameters, list fields are matched by any value
+    """
+    for _key, _value in search_params.items():
+        _distr_value = distr.get(_key)
+
+        if isinstance(_distr_value, list):
+            if _value not in _distr_value:
+                return False
+
+            continue
+
+        if _distr_value != _value:
+            return False
+
+    return True
+
+def _find_distributives(search_params_list, fields=None):
+    """
+    Find distributives for many search parameters at once with a single '$or' query
+    Results are matched back to search parameters in memory
+    :param search_params_list: list of search parameters dictionaries, none of them should be empty
+    :param fields: fields to load additionally to search ones, all fields are loaded if not given
+    :return: list of raw documents, one per search parameters, None if nothing or many found
+    """
+    if not search_params_list:
+        return list()
+
+    _distrs = Distributives.objects(functools.reduce(operator.or_, map(lambda x: Q(**x), search_params_list)))
+
+    if fields:
+        _distrs = _distrs.only(*(_distr_search_fields + ["is_actual"] + fields))
+
+    # index found documents by search keys to avoid matching every pair
+    _index = dict()
+    _distrs = list(_distrs.as_pymongo())
+
+    for _distr in _distrs:
+        for _key in ["path", "checksum"]:
+            for _value in _distr.get(_key) or list():
+                _index.setdefault((_key, _value), list()).append(_distr)
+
+        _index.setdefault(("citype", _distr.get("citype"), _distr.get("version")), list()).append(_distr)
+
+    _result = list()
+
+    for _search_params in search_params_list:
+        try:
+            if "checksum" in _search_params:
+                _candidates = _index.get(("checksum", _search_params.get("checksum")), list())
+            elif "path" in _search_params:
+                _candidates = _index.get(("path", _search_params.get("path")), list())
+            elif "citype" in _search_params:
+                _candidates = _index.get(("citype", _search_params.get("citype"), _search_params.get("version")), list())
             else:
-                _value = [_value]
+                _candidates = _distrs
+        except TypeError:
+            # unhashable search value, check all found documents then
+            _candidates = _distrs
+
+        _found = list(filter(lambda x: _distr_matches(x, _search_params), _candidates))
+        _result.append(_found.pop() if len(_found) == 1 else None)
+
+    return _result
+
+def _bulk_search_params(distrs):
+    """
+    Check and normalize search parameters for many distributives
+    :param distrs: list of dictionaries, not more than '_lookup_max_values'
+    :return: list of search parameters
+    """
+    if not isinstance(distrs, list) or not distrs:
+        raise ValueError(f"'distributives' should be a non-empty list, got: {type(distrs)}")
 
-            for _sub in _value:
-                _sub_out = dict((_key, getattr(_sub, _key)) for _key in _distr_search_fields)
+    if len(distrs) > _lookup_max_values:
+        raise ValueError(f"Too many distributives: {len(distrs)}, not more than {_lookup_max_values} allowed")
 
-                if not _is_list:
-                    _out[_attr] = _sub_out
-                    break
+    _result = list()
 
-                _out[_attr].append(_sub_out)
+    for _distr in distrs:
+        if not isinstance(_distr, dict):
+            raise ValueError(f"Search parameters should be a dictionary, got: {type(_distr)}")
 
-        _result.append(_out)
+        _search_params = _fix_distinct_search_params(_distr_search_params(_distr))
 
-        if count:
-            _counter += 1
+        if not _search_params:
+            raise ValueError(f"No relevant search keywords found: {_distr}")
 
-            if _counter > count:
-                break
+        _result.append(_search_params)
 
     return _result
 
+def _artifact_deliverable_verdicts(distrs):
+    """
+    Check deliverability for many distributives, parents of all of them are fetched by a single query
+    :param distrs: list of raw documents with 'artifact_deliverable' and 'parent' fields,
+                   None for the ones not found, which are considered deliverable
+    :return: list of booleans
+    """
+    _parent_ids = set(itertools.chain.from_iterable(map(lambda x: x.get("parent") or list(), filter(None, distrs))))
+    _parents = dict()
+
+    if _parent_ids:
+        _parents = dict((_parent.get("_id"), _parent.get("artifact_deliverable", True)) for _parent in
+                Distributives.objects(id__in=list(_parent_ids)).only("artifact_deliverable").as_pymongo())
+
+    # parents removed from database completely are ignored
+    return list(map(lambda x: not x or all([x.get("artifact_deliverable", True)] +
+        list(map(lambda y: _parents.get(y, True), x.get("parent") or list()))), distrs))
+
+def _transitive_deliverability(search_params, max_depth=None):
+    """
+    Check deliverability over the whole ancestry of a distributive with a single '$graphLookup'
+    :param search_params: distributive search parameters
+    :param max_depth: number of ancestry levels to check, None means 'all'
+    :return: tuple (deliverable, the closest blocking distributive or None)
+             blocking distributive is given by its search fields with 'depth': 0 for itself, 1 for parents and so on
+    """
+    _graph_lookup = {
+            "from": Distributives._get_collection_name(),
+            "startWith": "$parent",
+            "connectFromField": "parent",
+            "connectToField": "_id",
+            "as": "ancestors",
+            "depthField": "depth"}
+
+    # '$graphLookup' depth starts from zero for direct parents
+    if max_depth is not None:
+        _graph_lookup["maxDepth"] = max_depth - 1
+
+    _fields = dict((_key, 1) for _key in _distr_search_fields + ["artifact_deliverable"])
+    _fields.update(dict((f"ancestors.{_key}", 1) for _key in _distr_search_fields + ["artifact_deliverable", "depth"]))
+
+    # one more document is enough to know the search is ambiguous
+    _distrs = list(Distributives.objects(**search_params).limit(2).aggregate(
+        [{"$graphLookup": _graph_lookup}, {"$project": _fields}]))
+
+    if len(_distrs) != 1:
+        return True, None
+
+    _distr = _distrs.pop()
+    _distr["depth"] = 0
+
+    for _ancestor in _distr.get("ancestors"):
+        _ancestor["depth"] += 1
+
+    _blocking = list(filter(lambda x: not x.get("artifact_deliverable", True),
+        [_distr] + sorted(_distr.get("ancestors"), key=lambda x: x.get("depth"))))
+
+    if not _blocking:
+        return True, None
+
+    return False, dict((_key, _blocking[0].get(_key)) for _key in _distr_search_fields + ["depth"])
+
+def _graph_pipeline(distr_id, ancestors, max_depth=None, projection=None, after_id=None):
+    """
+    Make an aggregation pipeline for the whole ancestry or progeny of a distributive with a single '$graphLookup'
+    Found distributives are unwound right after the lookup, so the result is not limited by the document size
+    :param distr_id: '_id' of the distributive to start from
+    :param ancestors: walk to parents if True, to children otherwise
+    :param max_depth: number of levels to walk, None means 'all'
+    :param projection: tuple (fields to include, fields to exclude)
+    :param after_id: skip relatives with '_id' not greater than this one, for pagination
+    :return: list of pipeline stages, the result is ordered by '_id' with 'depth' added: 1 for direct relatives
+    """
+    if ancestors:
+        _graph_lookup = {"startWith": "$parent", "connectFromField": "parent", "connectToField": "_id"}
+    else:
+        _graph_lookup = {"startWith": "$_id", "connectFromField": "_id", "connectToField": "parent"}
+
+    _graph_lookup.update({
+        "from": Distributives._get_collection_name(),
+        "as": "relatives",
+        "depthField": "depth"})
+
+    # '$graphLookup' depth starts from zero for direct relatives
+    if max_depth is not None:
+        _graph_lookup["maxDepth"] = max_depth - 1
+
+    _pipeline = [
+            {"$match": {"_id": distr_id}},
+            {"$graphLookup": _graph_lookup},
+            {"$unwind": "$relatives"},
+            {"$replaceRoot": {"newRoot": "$relatives"}},
+            {"$addFields": {"depth": {"$add": ["$depth", 1]}}}]
+
+    if after_id:
+        _pipeline.append({"$match": {"_id": {"$gt": after_id}}})
+
+    _pipeline.append({"$sort": {"_id": 1}})
+
+    _include, _exclude = projection or (list(), list())
+
+    if _include:
+        _pipeline.append({"$project": dict((_key, 1) for _key in _include + ["depth", "parent_keys"])})
+    elif _exclude:
+        _pipeline.append({"$project": dict((_key, 0) for _key in _exclude +
+            (["parent_keys"] if "parent" in _exclude else list()))})
+
+    return _pipeline
+
+def _artifact_deliverable_result(search_params, transitive=False, max_depth=None):
+    """
+    Check deliverability of a distributive, see 'check_artifact_deliverable'
+    :param search_params: distributive search parameters
+    :param transitive: check the whole ancestry
+    :param max_depth: number of ancestry levels to check if transitive, None means 'all'
+    :return: JSON-serializable result
+    """
+    if transitive:
+        _deliverable, _blocked_by = _transitive_deliverability(search_params, max_depth)
+        return {"artifact_deliverable": _deliverable, "blocked_by": _blocked_by}
+
+    try:
+        _distr = Distributives.objects.only("artifact_deliverable", "parent").as_pymongo().get(**search_params)
+    except (DoesNotExist, MultipleObjectsReturned):
+        return [True]
+
+    return _artifact_deliverable_verdicts([_distr])
+
+def _deliverable_cache():
+    """
+    Get the deliverability cache of the current application, see 'create_app'
+    """
+    return current_app.extensions["artifact_deliverable_cache"]
+
+def _invalidate_deliverable_cache():
+    """
+    Drop cached deliverability after any write, since it depends on the whole ancestry
+    """
+    _deliverable_cache().clear()
+
 @mongo_api.route('/add_distributive', methods=['POST'])
 def add_distributive():
     """
@@ -212,6 +1133,11 @@ def add_distributive():
         logging.error(f"'parent' parameter is not a list: {type(_parents)}. Returning 400")
         return response(400, "'parent' is not list")
 
+    # version key is computed for strings only
+    if not isinstance(request.json.get("version"), str):
+        logging.error(f"'version' is not a string: {type(request.json.get('version'))}. Returning 400")
+        return response(400, "'version' is not a string")
+
     # get current one if in database already
     _citype = request.json.get("citype")
     _version = request.json.get("version")
@@ -246,11 +1172,18 @@ def add_distributive():
         return response(400, f"Search error {_citype}:{_version}:{_client}: {type(_e)}: {_e}")
 
     _distr.timestamp = datetime.now()
+    _distr.modified = _distr.timestamp
+    _distr.version_key = version_key(_version)
+
+    # keys of existing distributive may be changed, so its children have to be reconciled
+    _keys_changed = _distr.pk is not None
+    _parent_ids_before = _parent_ids(_distr)
 
     # set all fields as it is done for the first time
     _distr.path = [request.json.get("path")]
     _distr.checksum = [request.json.get("checksum")]
     _distr.parent = _resolve_parents(_parents)
+    _distr.parent_keys = _parent_keys(_distr.parent)
 
     try:
         _check_parent_loop(_distr)
@@ -277,7 +1210,15 @@ def add_distributive():
         logging.debug(f"Saving revision: {_revision.to_json()}")
         _revision.save()
 
-    return response(201, _distr.to_json())
+    _update_latest(_distr)
+    _update_children_count(_parent_ids_before, _parent_ids(_distr))
+    _bump_generations([_distr.citype])
+    _invalidate_deliverable_cache()
+
+    if _keys_changed:
+        _reconcile_parent_keys_later(_distr.pk)
+
+    return response(201, _distr_to_json(_distr))
 
 @mongo_api.route('/update_distributive', methods=['POST'])
 def update_distributive():
@@ -343,6 +1284,7 @@ def update_distributive():
     _artifact_deliverable = _changes.get("artifact_deliverable")
     _comment = _changes.get("commentary")
     _changes_detected = False
+    _keys_changed = False
     _revision = None
 
     logging.debug("Looking for append fields in 'changes'")
@@ -361,6 +1303,7 @@ def update_distributive():
             continue
 
         _changes_detected = True
+        _keys_changed = True
         logging.debug(f"Appending new value: '{_append_value}'")
         _current_value.append(_append_value)
         setattr(_distr, _append_field, _current_value)
@@ -371,7 +1314,9 @@ def update_distributive():
     if _parents:
         logging.debug("Parents replacement requested")
         _changes_detected = True
+        _parent_ids_before = _parent_ids(_distr)
         _distr.parent = _resolve_parents(_parents)
+        _distr.parent_keys = _parent_keys(_distr.parent)
 
         try:
             _check_parent_loop(_distr)
@@ -407,12 +1352,14 @@ def update_distributive():
     # return OK if no changes detected
     if not _changes_detected:
         logging.debug("No changes detected, returning 200")
-        return response(200, _distr.to_json())
+        return response(200, _distr_to_json(_distr))
+
+    _distr.modified = datetime.now()
 
     # save revision if needed only
     if _revision:
         _distr.revision += 1
-        _distr.timestamp = datetime.now()
+        _distr.timestamp = _distr.modified
         logging.debug(f"New revision value: {_distr.revision}. Timestamp: {_distr.timestamp}")
 
     # return error in case of conflict
@@ -420,7 +1367,7 @@ def update_distributive():
         _distr.save()
     except NotUniqueError:
         logging.error(f"Existing distributive found: {_distr.to_json()}. Returning 409")
-        return response(409, f"Already assigned to another distributive: {_distr.to_json()}'")
+        return response(409, f"Already assigned to another distributive: {_distr_to_json(_distr)}'")
 
     # Saving current state of the document to Revisions collection
     # It should be done only if the current distributive update above was successfull
@@ -428,8 +1375,18 @@ def update_distributive():
         _revision.save()
         logging.debug(f"Revision saved: {_revision.revision}")
 
+    _update_latest(_distr)
+    _bump_generations([_distr.citype])
+    _invalidate_deliverable_cache()
+
+    if _parents:
+        _update_children_count(_parent_ids_before, _parent_ids(_distr))
+
+    if _keys_changed:
+        _reconcile_parent_keys_later(_distr.pk)
+
     logging.debug("Changes saved. Returning 201")
-    return response(201, _distr.to_json())
+    return response(201, _distr_to_json(_distr))
 
 @mongo_api.route('/delete_distributive', methods=['DELETE'])
 def delete_distributive():
@@ -488,8 +1445,65 @@ def delete_distributive():
 
     # here we do not want do catch an exception sicne we are removing values only
     logging.debug(f"Marking inactual: {_distr.to_json()}. Returning 200")
+    _distr.modified = datetime.now()
     _distr.save()
-    return response(200, _distr.to_json())
+    _update_latest(_distr)
+    _bump_generations([_distr.citype])
+    _invalidate_deliverable_cache()
+
+    # paths are removed, so children keep outdated ones otherwise
+    _reconcile_parent_keys_later(_distr.pk)
+    return response(200, _distr_to_json(_distr))
+
+@mongo_api.route('/get_distributive', methods=['GET'])
+def get_distributive():
+    """
+    Get a single actual distributive
+    Conditional request with 'If-None-Match' is answered by the state fields only, not loading the document
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    try:
+        _search_params = _fix_distinct_search_params(_distr_search_params(request.json))
+
+        if not _search_params:
+            raise ValueError("No relevant search keywords found")
+    except ValueError as _e:
+        logging.error(f"Search error {request.json}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {request.json}: {type(_e)}: {_e}")
+
+    _search_params["is_actual"] = True
+    logging.debug(f"Search params: {_search_params}")
+
+    try:
+        _state = Distributives.objects.only("revision", "timestamp", "modified").as_pymongo().get(**_search_params)
+    except DoesNotExist:
+        logging.error(f"Not found: {_search_params}. Returning 404")
+        return response(404, f"Not found: {_search_params}")
+    except MultipleObjectsReturned:
+        logging.error(f"Multiple found: {_search_params}. Returning 409")
+        return response(409, f"Exists many times: {_search_params}")
+    except Exception as _e:
+        logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
+
+    _etag = _distr_etag(_state)
+
+    if request.if_none_match.contains(_etag):
+        logging.debug(f"Not modified: {_search_params}. Returning 304")
+        return not_modified_response(_etag)
+
+    # it may be changed or deleted meanwhile, so the tag is made from the document loaded
+    _distr = Distributives.objects(id=_state.get("_id"), is_actual=True).as_pymongo().first()
+
+    if not _distr:
+        logging.error(f"Not found: {_search_params}. Returning 404")
+        return response(404, f"Not found: {_search_params}")
+
+    _response = response(200, json.dumps(_distrs_list_for_json([_distr]).pop()))
+    _response.set_etag(_distr_etag(_distr))
+    return _response
 
 @mongo_api.route('/get_distributives', methods=['GET'])
 def get_distributives():
@@ -499,6 +1513,11 @@ def get_distributives():
 
     _search_params = dict()
     _count = None
+    _skip = None
+    _sort = None
+    _fields = None
+    _page_size = None
+    _cursor = None
 
     # check 'artifact_deliverable' value
     if request.json:
@@ -513,15 +1532,108 @@ def get_distributives():
             _search_params["artifact_deliverable"] = _artifact_deliverable
 
         _count = request.json.get("count")
+        _skip = request.json.get("skip")
+        _sort = request.json.get("sort")
+        _fields = request.json.get("fields")
+        _page_size = request.json.get("page_size")
+        _cursor = request.json.get("cursor")
 
     _search_params["is_actual"] = True
 
-    return response(200, json.dumps(_distrs_list_for_json(Distributives.objects(**_search_params), _count)))
+    try:
+        _projection_fields = _projection(_fields, _distr_fields)
+    except ValueError as _e:
+        logging.error(f"Projection error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Projection error: {type(_e)}: {_e}")
+
+    # validators are taken before the data, so a change meanwhile gives a new tag next time
+    _etag, _last_modified = _cache_validators(
+            [_search_params.get("citype")] if isinstance(_search_params.get("citype"), str) else None)
+
+    if _is_not_modified(_etag, _last_modified):
+        return not_modified_response(_etag, _last_modified)
+
+    _distrs = _project_queryset(Distributives.objects(**_search_params), _projection_fields)
+
+    if _page_size is None and _cursor is None:
+        try:
+            _distrs = _limit_queryset(_distrs, _count, _skip, _sort)
+        except ValueError as _e:
+            logging.error(f"Listing parameters error: {type(_e)}: {_e}. Returning 400")
+            return response(400, f"Listing parameters error: {type(_e)}: {_e}")
+
+        if _wants_ndjson():
+            return _set_cache_validators(ndjson_response(200, _distrs_stream_for_json(_distrs)),
+                    _etag, _last_modified)
+
+        return _set_cache_validators(response(200, json.dumps(_distrs_list_for_json(_distrs.as_pymongo()))),
+                _etag, _last_modified)
+
+    # cursor-based pagination requested
+    # a page is limited by its size, so it is never streamed
+    # it has its own ordering and limit, so others are not allowed
+    if any(map(lambda x: x is not None, [_count, _skip, _sort])):
+        logging.error("'count', 'skip' and 'sort' are not supported with pagination. Returning 400")
+        return response(400, "'count', 'skip' and 'sort' can not be combined with 'page_size' and 'cursor'")
+
+    try:
+        _page_size = _positive_int(_page_size, "page_size")
+        _page, _next_cursor = _paginate(_distrs, _page_size, _cursor)
+    except ValueError as _e:
+        logging.error(f"Pagination error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Pagination error: {type(_e)}: {_e}")
+
+    return _set_cache_validators(response(200, json.dumps({
+        "values": _distrs_list_for_json(_page),
+        "page_size": _page_size,
+        "next_cursor": _next_cursor})), _etag, _last_modified)
+
+@mongo_api.route('/lookup/checksums', methods=['POST'])
+def lookup_checksums():
+    """
+    Get many distributives by checksums at once
+    Distributive is 'null' for checksums unknown
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    _checksums = request.json.get("checksums")
+
+    try:
+        _found = _lookup_by_values("checksum", _checksums)
+    except ValueError as _e:
+        logging.error(f"Lookup error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Lookup error: {type(_e)}: {_e}")
+
+    logging.debug(f"Found {len(_found)} of {len(_checksums)} checksums")
+    return response(200, json.dumps(dict((_checksum, _found.get(_checksum)) for _checksum in _checksums)))
+
+@mongo_api.route('/lookup/paths', methods=['POST'])
+def lookup_paths():
+    """
+    Get many distributives by paths (GAVs) at once
+    Results are in the same order as paths given, 'null' for paths unknown
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    _paths = request.json.get("paths")
+
+    try:
+        _found = _lookup_by_values("path", _paths)
+    except ValueError as _e:
+        logging.error(f"Lookup error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Lookup error: {type(_e)}: {_e}")
+
+    logging.debug(f"Found {len(_found)} of {len(_paths)} paths")
+    return response(200, json.dumps(list(map(lambda x: _found.get(x), _paths))))
 
 @mongo_api.route('/get_distributive_revisions', methods=['GET'])
 def get_distributive_revisions():
     """
-    Get all revisions for the distributive
+    Get all revisions for the distributive, the newest first
+    They may be limited by 'since' and 'until' timestamps, and by 'limit' number
+    or paginated with 'page_size' and 'cursor'
     """
     # Check te request. If nothing specified - then nothing to do
     if not request.json:
@@ -534,6 +1646,30 @@ def get_distributive_revisions():
         return response(400, f"Search error: {request.json}: {type(_e)}: {_e}")
 
     _search_params["is_actual"] = True
+    _limit = request.json.get("limit")
+    _page_size = request.json.get("page_size")
+    _cursor = request.json.get("cursor")
+
+    try:
+        _projection_fields = _projection(request.json.get("fields"), _revision_output_fields)
+    except ValueError as _e:
+        logging.error(f"Projection error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Projection error: {type(_e)}: {_e}")
+
+    try:
+        _range_params = _revisions_range_params(request.json)
+
+        if _limit is not None:
+            if _page_size is not None or _cursor is not None:
+                raise ValueError("'limit' can not be combined with 'page_size' and 'cursor'")
+
+            _limit = _positive_int(_limit, "limit")
+
+        if _page_size is not None or _cursor is not None:
+            _page_size = _positive_int(_page_size, "page_size")
+    except ValueError as _e:
+        logging.error(f"Listing parameters error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Listing parameters error: {type(_e)}: {_e}")
 
     logging.debug(f"Search params: {_search_params}")
 
@@ -549,20 +1685,128 @@ def get_distributive_revisions():
         logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
         return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
 
-    _revisions = DistributivesRevisions.objects(revision_of=_distr).order_by('-timestamp')
+    # served by '(revision_of, -timestamp, -_id)' index
+    _revisions = _project_queryset(DistributivesRevisions.objects(revision_of=_distr.pk, **_range_params),
+            _projection_fields).order_by("-timestamp", "-id")
+
+    # the current state is the newest revision, it is on the first page only
+    # pairs (identifier for cursor, output value) are collected
+    _values = list()
+
+    if _cursor is None and _in_revisions_range(_distr.timestamp, _range_params):
+        _values.append((_distr.pk, _project_output(
+            _bson_for_json(_create_revision(_distr).to_mongo().to_dict()), _projection_fields)))
+
+    try:
+        if _cursor is not None:
+            _revisions = _revisions_after(_revisions, _distr.pk, _cursor)
+    except ValueError as _e:
+        logging.error(f"Pagination error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Pagination error: {type(_e)}: {_e}")
+
+    # one extra revision tells us if there is something after this page, see '_paginate'
+    _size = _page_size + 1 if _page_size else _limit
+
+    if not _size or _size > len(_values):
+        if _size:
+            _revisions = _revisions.limit(_size - len(_values))
+
+        _values += list(map(lambda x: (x.get("_id"), _bson_for_json(x)), _revisions.as_pymongo()))
+
+    if _page_size is None:
+        return response(200, json.dumps(list(map(lambda x: x[1], _values))))
 
-    # Appending the current state to the beginning of the list
-    # seems converting to list is the only correct way to produce final JSON
-    # because objects of type Distributives are not JSON-serializable
+    _next_cursor = None
 
-    return response(200, json.dumps(
-        list(map(lambda x: json.loads(x.to_json()), [_create_revision(_distr)] + list(_revisions)))))
+    if len(_values) > _page_size:
+        _values = _values[:_page_size]
+        _next_cursor = _encode_cursor(_values[-1][0])
+
+    return response(200, json.dumps({
+        "values": list(map(lambda x: x[1], _values)),
+        "page_size": _page_size,
+        "next_cursor": _next_cursor}))
+
+def _revisions_groups(distrs, range_params, projection):
+    """
+    Generate revisions of many distributives grouped by distributive, the newest first in a group
+    Revisions of all distributives are read by a single query as a stream
+    :param distrs: raw documents of actual distributives, with revision fields
+    :param range_params: search parameters for timestamps, see '_revisions_range_params'
+    :param projection: tuple (fields to include, fields to exclude)
+    :return: generator of dictionaries {"distributive": keys, "revisions": list},
+             groups are generated once all revisions of a distributive are read
+    """
+    _distrs = dict((_distr.get("_id"), _distr) for _distr in distrs)
+    _include, _exclude = projection
+
+    # grouping needs the reference even if it is not requested
+    _revisions = _project_queryset(DistributivesRevisions.objects(revision_of__in=list(_distrs.keys()),
+        **range_params), (_include + ["revision_of"] if _include else _include, _exclude))
+
+    # served by '(revision_of, -timestamp, -_id)' index, so revisions of one distributive are consecutive
+    _revisions = _revisions.order_by("revision_of", "-timestamp", "-id").as_pymongo().no_cache()
+
+    def _group(distr, revisions):
+        _values = list()
+
+        # the current state is the newest revision
+        if _in_revisions_range(distr.get("timestamp"), range_params):
+            _values.append(_create_revision(Distributives._from_son(distr)).to_mongo().to_dict())
+
+        return {
+            "distributive": dict((_key, distr.get(_key)) for _key in _distr_search_fields),
+            "revisions": list(map(lambda x: _project_output(_bson_for_json(x), projection), _values + revisions))}
+
+    for _id, _revisions_group in itertools.groupby(_revisions, key=lambda x: x.get("revision_of")):
+        yield _group(_distrs.pop(_id), list(_revisions_group))
+
+    # those having no revisions stored
+    for _distr in _distrs.values():
+        yield _group(_distr, list())
+
+@mongo_api.route('/revisions/bulk', methods=['POST'])
+def get_revisions_bulk():
+    """
+    Get revisions for many distributives at once, grouped by distributive
+    Distributives not found (or found many times) are given with 'null' revisions first
+    The result is streamed as NDJSON if requested, one group per line
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    try:
+        _search_params_list = _bulk_search_params(request.json.get("distributives"))
+        _projection_fields = _projection(request.json.get("fields"), _revision_output_fields)
+        _range_params = _revisions_range_params(request.json)
+    except ValueError as _e:
+        logging.error(f"Revisions request error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Revisions request error: {type(_e)}: {_e}")
+
+    logging.debug(f"Search params: {_search_params_list}")
+
+    try:
+        _distrs = _find_distributives(list(map(lambda x: dict(x, is_actual=True), _search_params_list)),
+                _revision_fields)
+    except Exception as _e:
+        logging.error(f"Search error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {type(_e)}: {_e}")
+
+    _groups = itertools.chain(
+        map(lambda x: {"distributive": x[0], "revisions": None},
+            filter(lambda x: not x[1], zip(_search_params_list, _distrs))),
+        _revisions_groups(filter(None, _distrs), _range_params, _projection_fields))
+
+    if _wants_ndjson():
+        return ndjson_response(200, _groups)
+
+    return response(200, json.dumps(list(_groups)))
 
 @mongo_api.route('/get_versions_by_citype', methods=['GET'])
 def get_versions_by_citype():
     """
     Get all versions by citype
-    No sorting applied, it is a task of a requestor
+    Sorted by normalized version key on database side
     """
     if not request.json:
          return response(400, "'citype' is mandatory")
@@ -593,15 +1837,29 @@ def get_versions_by_citype():
 
         _search_params["artifact_deliverable"] = _artifact_deliverable
 
+    try:
+        _search_params.update(_version_range_params(request.json))
+    except ValueError as _e:
+        logging.error(f"Versions range error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Versions range error: {type(_e)}: {_e}")
+
     logging.debug(f"Search params: {_search_params}")
+    _etag, _last_modified = _cache_validators([_citype])
+
+    if _is_not_modified(_etag, _last_modified):
+        return not_modified_response(_etag, _last_modified)
 
-    _versions_list = Distributives.objects(**_search_params).distinct(field="version")
-    return response(200, json.dumps(_versions_list))
+    # version is unique for citype-client pair, so 'distinct' is not needed
+    _versions_list = list(map(lambda x: x.get("version"),
+        Distributives.objects(**_search_params).only("version").order_by("version_key").as_pymongo()))
+    return _set_cache_validators(response(200, json.dumps(_versions_list)), _etag, _last_modified)
 
 @mongo_api.route('/artifact_deliverable', methods=['GET'])
 def check_artifact_deliverable():
     """
     Check artifact_deliverable
+    With 'transitive' the whole ancestry is checked, up to 'max_depth' levels if given,
+    and the closest ancestor blocking delivery is returned also
     """
     # Check te request. If nothing specified - then nothing to do
     if not request.json:
@@ -619,16 +1877,293 @@ def check_artifact_deliverable():
     # returning default 'True' in case of known exceptions
 
     logging.debug(f"Search params: {_search_params}")
+    _transitive = request.json.get("transitive")
 
     try:
-        _distr = Distributives.objects.get(**_search_params)
-    except (DoesNotExist, MultipleObjectsReturned):
-        return response(200, json.dumps([True]))
+        # strings like "false" would be true otherwise
+        if _transitive is not None and not isinstance(_transitive, bool):
+            raise ValueError(f"'transitive' should be a boolean, got: {_transitive}")
+
+        _transitive = bool(_transitive)
+
+        _max_depth = request.json.get("max_depth") if _transitive else None
+
+        if _max_depth is not None:
+            _max_depth = _positive_int(_max_depth, "max_depth")
+    except ValueError as _e:
+        logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
+
+    _cache = _deliverable_cache()
+    _cache_key = json.dumps([_search_params, _transitive, _max_depth], sort_keys=True)
+    _found, _result, _epoch = _cache.get(_cache_key)
+
+    if _found:
+        return response(200, _result)
+
+    try:
+        _result = json.dumps(_artifact_deliverable_result(_search_params, _transitive, _max_depth))
+    except Exception as _e:
+        logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
+
+    _cache.put(_cache_key, _result, _epoch)
+    return response(200, _result)
+
+@mongo_api.route('/artifact_deliverable/cache', methods=['GET'])
+def artifact_deliverable_cache_stats():
+    """
+    Get counters of the deliverability cache of this process
+    """
+    return response(200, json.dumps(_deliverable_cache().stats()))
+
+@mongo_api.route('/artifact_deliverable/bulk', methods=['POST'])
+def check_artifact_deliverable_bulk():
+    """
+    Check artifact_deliverable for many distributives at once
+    Verdicts are returned in the same order as distributives given
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    try:
+        _search_params_list = _bulk_search_params(request.json.get("distributives"))
+    except ValueError as _e:
+        logging.error(f"Search error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {type(_e)}: {_e}")
+
+    logging.debug(f"Search params: {_search_params_list}")
+
+    try:
+        _distrs = _find_distributives(_search_params_list, ["artifact_deliverable", "parent"])
+    except Exception as _e:
+        logging.error(f"Search error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {type(_e)}: {_e}")
+
+    return response(200, json.dumps(_artifact_deliverable_verdicts(_distrs)))
+
+def _graph_response(ancestors):
+    """
+    Common part of ancestors and descendants requests
+    :param ancestors: walk to parents if True, to children otherwise
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    try:
+        _search_params = _fix_distinct_search_params(_distr_search_params(request.json))
+
+        if not _search_params:
+            raise ValueError("No relevant search keywords found")
+    except ValueError as _e:
+        logging.error(f"Search error {request.json}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {request.json}: {type(_e)}: {_e}")
+
+    _max_depth = request.json.get("max_depth")
+    _page_size = request.json.get("page_size")
+    _cursor = request.json.get("cursor")
+
+    try:
+        if _max_depth is not None:
+            _max_depth = _positive_int(_max_depth, "max_depth")
+
+        if _page_size is not None or _cursor is not None:
+            _page_size = _positive_int(_page_size, "page_size")
+
+        if _cursor is not None:
+            _cursor = _decode_cursor(_cursor)
+
+        _projection_fields = _projection(request.json.get("fields"), _distr_fields)
+    except ValueError as _e:
+        logging.error(f"Graph parameters error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Graph parameters error: {type(_e)}: {_e}")
+
+    logging.debug(f"Search params: {_search_params}")
+
+    try:
+        _distr = Distributives.objects.only("id").as_pymongo().get(**_search_params)
+    except DoesNotExist:
+        logging.error(f"Not found: {_search_params}. Returning 404")
+        return response(404, f"Not found: {_search_params}")
+    except MultipleObjectsReturned:
+        logging.error(f"Multiple found: {_search_params}. Returning 409")
+        return response(409, f"Exists many times: {_search_params}")
+    except Exception as _e:
+        logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
+
+    _pipeline = _graph_pipeline(_distr.get("_id"), ancestors, _max_depth, _projection_fields, _cursor)
+
+    if _page_size is None:
+        return response(200, json.dumps(_distrs_list_for_json(
+            Distributives._get_collection().aggregate(_pipeline, allowDiskUse=True))))
+
+    # one extra document tells us if there is something after this page, see '_paginate'
+    _pipeline.append({"$limit": _page_size + 1})
+    _page = list(Distributives._get_collection().aggregate(_pipeline, allowDiskUse=True))
+    _next_cursor = None
+
+    if len(_page) > _page_size:
+        _page = _page[:_page_size]
+        _next_cursor = _encode_cursor(_page[-1].get("_id"))
+
+    return response(200, json.dumps({
+        "values": _distrs_list_for_json(_page),
+        "page_size": _page_size,
+        "next_cursor": _next_cursor}))
+
+@mongo_api.route('/graph/ancestors', methods=['GET'])
+def graph_ancestors():
+    """
+    Get all distributives the one given is built from: parents, their parents and so on
+    'depth' of each is the number of levels from the distributive given
+    """
+    return _graph_response(ancestors=True)
+
+@mongo_api.route('/graph/descendants', methods=['GET'])
+def graph_descendants():
+    """
+    Get all distributives built from the one given: children, their children and so on
+    'depth' of each is the number of levels from the distributive given
+    """
+    return _graph_response(ancestors=False)
+
+@mongo_api.route('/children', methods=['GET'])
+def get_children():
+    """
+    Get distributives having the one given as a direct parent
+    Paginated with 'page_size' and 'cursor' the same way as 'get_distributives'
+    """
+    if not request.json:
+        return response(400, "No data provided")
+
+    try:
+        _search_params = _fix_distinct_search_params(_distr_search_params(request.json))
+
+        if not _search_params:
+            raise ValueError("No relevant search keywords found")
+    except ValueError as _e:
+        logging.error(f"Search error {request.json}: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Search error: {request.json}: {type(_e)}: {_e}")
+
+    try:
+        _projection_fields = _projection(request.json.get("fields"), _distr_fields)
+    except ValueError as _e:
+        logging.error(f"Projection error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Projection error: {type(_e)}: {_e}")
+
+    logging.debug(f"Search params: {_search_params}")
+
+    try:
+        _distr = Distributives.objects.only("id").as_pymongo().get(**_search_params)
+    except DoesNotExist:
+        logging.error(f"Not found: {_search_params}. Returning 404")
+        return response(404, f"Not found: {_search_params}")
+    except MultipleObjectsReturned:
+        logging.error(f"Multiple found: {_search_params}. Returning 409")
+        return response(409, f"Exists many times: {_search_params}")
     except Exception as _e:
         logging.error(f"Search error: {_search_params}: {type(_e)}: {_e}. Returning 400")
         return response(400, f"Search error: {_search_params}: {type(_e)}: {_e}")
 
-    return response(200, json.dumps([all(list(map(lambda x: x.artifact_deliverable, [_distr] + _distr.parent)))]))
+    # served by 'parent' index
+    _children = _project_queryset(Distributives.objects(parent=_distr.get("_id")), _projection_fields)
+    _page_size = request.json.get("page_size")
+    _cursor = request.json.get("cursor")
+
+    if _page_size is None and _cursor is None:
+        if _wants_ndjson():
+            return ndjson_response(200, _distrs_stream_for_json(_children))
+
+        return response(200, json.dumps(_distrs_list_for_json(_children.as_pymongo())))
+
+    try:
+        _page_size = _positive_int(_page_size, "page_size")
+        _page, _next_cursor = _paginate(_children, _page_size, _cursor)
+    except ValueError as _e:
+        logging.error(f"Pagination error: {type(_e)}: {_e}. Returning 400")
+        return response(400, f"Pagination error: {type(_e)}: {_e}")
+
+    return response(200, json.dumps({
+        "values": _distrs_list_for_json(_page),
+        "page_size": _page_size,
+        "next_cursor": _next_cursor}))
+
+def _versions_by_citype_values(citypes, range_params=None):
+    """
+    Generate version records for all distributives of citypes given.
+    One aggregation is run per citype in the order given, 'paths' and 'checksums' are sorted by database
+    :param citypes: list of citypes
+    :param range_params: versions range search parameters, see '_version_range_params'
+    :return: generator of dictionaries, grouped by citype in the order given
+    """
+    _pipeline = [
+            {"$project": {"citype": 1, "version": 1, "path": 1, "checksum": 1}},
+            {"$unwind": {"path": "$path", "preserveNullAndEmptyArrays": True}},
+            {"$sort": {"path": 1}},
+            {"$group": {
+                "_id": "$_id",
+                "citype": {"$first": "$citype"},
+                "version": {"$first": "$version"},
+                "checksum": {"$first": "$checksum"},
+                "paths": {"$push": "$path"}}},
+            {"$unwind": {"path": "$checksum", "preserveNullAndEmptyArrays": True}},
+            {"$sort": {"checksum": 1}},
+            {"$group": {
+                "_id": "$_id",
+                "citype": {"$first": "$citype"},
+                "version": {"$first": "$version"},
+                "paths": {"$first": "$paths"},
+                "checksums": {"$push": "$checksum"}}},
+            {"$sort": {"_id": 1}}]
+
+    # one aggregation per citype keeps the order requested without buffering the result
+    for _citype in citypes:
+        for _distr in Distributives.objects(citype=_citype, **(range_params or dict())).aggregate(
+                _pipeline, allowDiskUse=True):
+            # empty lists are unwound to a single missing value
+            yield {"ci_type": _distr.get("citype"),
+                    "paths": [_path for _path in _distr.get("paths") if _path is not None],
+                    "checksums": [_checksum for _checksum in _distr.get("checksums") if _checksum is not None],
+                    "version": _distr.get("version")
+                    }
+
+def _latest_versions_by_citype_values(citypes, range_params=None):
+    """
+    Get the latest actual version records for citypes given from materialized collection
+    :param citypes: list of citypes
+    :param range_params: versions range search parameters, see '_version_range_params'
+    :return: list of dictionaries, one per citype found, in the order given
+    """
+    _latest = dict()
+    _records = DistributivesLatest.objects(citype__in=citypes).as_pymongo()
+
+    if range_params and "version_key__lte" in range_params:
+        # the latest version may be out of range, so look for the greatest version
+        # in range by index-ordered scan
+        _records = filter(None, map(lambda x: Distributives.objects(
+            citype=x, is_actual=True, **range_params).only("citype", "version", "path", "checksum").order_by(
+                "-version_key").as_pymongo().first(), citypes))
+    elif range_params:
+        # lower bounds only: the latest version is either in range or there is nothing
+        _records = filter(lambda x: all([
+            version_key(x.get("version")) >= range_params.get("version_key__gte", ""),
+            version_key(x.get("version")) > range_params.get("version_key__gt", "")]), _records)
+
+    # there is one record per citype-client pair, so the choice among clients is cheap
+    for _record in _records:
+        _current = _latest.get(_record.get("citype"))
+
+        if _current and not _is_newer_version(_record.get("version"), _current.get("version")):
+            continue
+
+        _latest[_record.get("citype")] = _record
+
+    return [{"ci_type": _citype,
+                "paths": sorted(_latest[_citype].get("path")),
+                "checksums": sorted(_latest[_citype].get("checksum")),
+                "version": _latest[_citype].get("version")
+                } for _citype in citypes if _citype in _latest]
 
 @mongo_api.route('/versions_by_citype/<path:_version_state>', methods=['GET'])
 def versions_by_citype(_version_state=None):
@@ -637,7 +2172,6 @@ def versions_by_citype(_version_state=None):
     Sorting applied
     """
     return_response_status = 200
-    _search_params = dict()
     out_values = list()
     return_json = {"values": out_values }
     ci_types_lists = request.args.getlist("ci_type")
@@ -654,34 +2188,44 @@ def versions_by_citype(_version_state=None):
     clean_ci_types_lists = list(dict.fromkeys(ci_types_lists))
     logging.debug(f"{clean_ci_types_lists}")
 
-    for _each_citype in clean_ci_types_lists:
-        _search_params["citype"] = _each_citype
-        _versions_list = Distributives.objects(**_search_params)
-        _out_values = list()
+    try:
+        _range_params = _version_range_params(request.args)
+    except ValueError as _e:
+        return_json = {"values": [], "error": f"Versions range error: {_e}"}
+        return response(400, json.dumps(return_json))
 
-        if not _versions_list:
-            continue
+    _etag, _last_modified = _cache_validators(clean_ci_types_lists)
 
-        for _each_ci_type_object in _versions_list:
-            _sorted_paths = deepcopy(_each_ci_type_object.path)
-            _sorted_checksum = deepcopy(_each_ci_type_object.checksum)
-            _sorted_paths.sort()
-            _sorted_checksum.sort()
-            _dict = {"ci_type": _each_citype,
-                    "paths": deepcopy(_sorted_paths),
-                    "checksums": deepcopy(_sorted_checksum),
-                    "version": _each_ci_type_object.version
-                    }
-            _out_values.append(_dict)
+    if _is_not_modified(_etag, _last_modified):
+        return not_modified_response(_etag, _last_modified)
 
-        if not _out_values:
-            continue
+    if _version_state == 'latest':
+        out_values = _latest_versions_by_citype_values(clean_ci_types_lists, _range_params)
 
-        if _version_state == 'latest':
-            _out_values.sort(key=lambda x: version.parse(x.get("version")))
-            out_values.append(_out_values.pop())
-        else:
-            out_values.extend(_out_values)
+        if not out_values:
+            return_json = { "values": [],
+                            "error": "No version data found"}
+            return response(404, json.dumps(return_json))
+
+        return _set_cache_validators(response(return_response_status, json.dumps({"values": out_values})),
+                _etag, _last_modified)
+
+    _values = _versions_by_citype_values(clean_ci_types_lists, _range_params)
+
+    if _wants_ndjson():
+        # peek the first value to know if there is something to stream at all
+        _first_value = next(_values, None)
+
+        if _first_value is None:
+            return_json = { "values": [],
+                            "error": "No version data found"}
+            return response(404, json.dumps(return_json))
+
+        return _set_cache_validators(
+                ndjson_response(return_response_status, itertools.chain([_first_value], _values)),
+                _etag, _last_modified)
+
+    out_values.extend(_values)
 
     if not out_values:
         return_json = { "values": [],
@@ -689,4 +2233,4 @@ def versions_by_citype(_version_state=None):
         return response(404, json.dumps(return_json))
 
     return_json = {"values": out_values }
-    return response(return_response_status, json.dumps(return_json))
+    return _set_cache_validators(response(return_response_status, json.dumps(return_json)), _etag, _last_modified)
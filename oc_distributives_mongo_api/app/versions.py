@@ -0,0 +1,134 @@
+import re
+from functools import lru_cache
+
+# Versions are ordered with Maven semantics:
+# numeric parts are compared as numbers, trailing zeroes are insignificant (1.0 == 1),
+# known qualifiers are ordered: alpha < beta < milestone < rc < snapshot < release < sp,
+# unknown qualifiers are greater than 'sp' and compared alphabetically, numbers are greater than any qualifier,
+# a number after a hyphen or right after letters starts a sub-version, so it is lower than the same number after a dot:
+# 1 < 1-1 < 1.1, but it is greater than any qualifier
+_token_re = re.compile(r"\d+|[^\W\d_]+", re.ASCII)
+_qualifiers = {
+        "alpha": 0, "a": 0,
+        "beta": 1, "b": 1,
+        "milestone": 2, "m": 2,
+        "rc": 3, "cr": 3,
+        "snapshot": 4}
+_release_qualifiers = ["", "ga", "final", "release"]
+_service_pack_qualifiers = ["sp"]
+_short_qualifiers = ["a", "b", "m"]
+
+# parsed item kinds, in ascending order
+_kind_qualifier = 0
+_kind_release = 1
+_kind_service_pack = 2
+_kind_unknown = 3
+_kind_sub_number = 4
+_kind_number = 5
+
+# the end of version is equal to a release qualifier, so '1' < '1-sp' and '1-rc' < '1'
+_item_end = (_kind_release, 0, "")
+
+# string prefixes for item kinds, separator is lower than any character of the items,
+# so a shorter unknown qualifier is lower
+_key_prefixes = {
+        _kind_qualifier: "a",
+        _kind_release: "b",
+        _kind_service_pack: "c",
+        _kind_unknown: "d",
+        _kind_sub_number: "e",
+        _kind_number: "f"}
+_key_separator = "."
+
+_cache_size = 16384
+
+def _parse_item(token, next_token, sub):
+    """
+    Make comparable item from version token
+    :param token: lowercase token, either digits or letters
+    :param next_token: token following, None for the last one
+    :param sub: token follows a hyphen or letters, so a number starts a sub-version
+    :return: tuple (kind, number length or qualifier rank, number digits or unknown qualifier)
+    """
+    # numbers are compared by length, then by digits, so they are not limited in size
+    if token.isdecimal():
+        _digits = token.lstrip("0")
+        return (_kind_sub_number if sub else _kind_number, len(_digits), _digits)
+
+    # 'a1', 'b2', 'm3' are short forms, but 'a' itself is unknown
+    if token in _short_qualifiers and not (next_token and next_token.isdecimal()):
+        return (_kind_unknown, 0, token)
+
+    if token in _qualifiers:
+        return (_kind_qualifier, _qualifiers[token], "")
+
+    if token in _release_qualifiers:
+        return _item_end
+
+    if token in _service_pack_qualifiers:
+        return (_kind_service_pack, 0, "")
+
+    return (_kind_unknown, 0, token)
+
+def _is_null_item(item):
+    """
+    Check if version item is insignificant at the end of version or before a qualifier
+    """
+    return item == _item_end or item in [(_kind_number, 0, ""), (_kind_sub_number, 0, "")]
+
+@lru_cache(maxsize=_cache_size)
+def parse_version(value):
+    """
+    Parse a version to a precomputed key: comparison of keys gives the versions order
+    :param value: version string
+    :return: tuple of items
+    """
+    _value = value.lower()
+    _matches = list(_token_re.finditer(_value))
+    _result = list()
+    _previous_end = None
+
+    for _match, _next_match in zip(_matches, _matches[1:] + [None]):
+        # no separator between tokens means switching between letters and digits: 1.0-rc1 == 1.0-rc-1
+        _sub = _match.start() == _previous_end or (_match.start() > 0 and _value[_match.start() - 1] == "-")
+        _item = _parse_item(_match.group(), _next_match.group() if _next_match else None, _sub)
+        _previous_end = _match.end()
+
+        # zeroes before a qualifier or a sub-version are insignificant: 1.0-alpha == 1-alpha, 1.0-1 == 1-1
+        if _item[0] != _kind_number:
+            while _result and _is_null_item(_result[-1]):
+                _result.pop()
+
+        _result.append(_item)
+
+    while _result and _is_null_item(_result[-1]):
+        _result.pop()
+
+    _result.append(_item_end)
+    return tuple(_result)
+
+@lru_cache(maxsize=_cache_size)
+def version_key(value):
+    """
+    Make a normalized version key: comparison of keys as strings gives the versions order,
+    so it may be stored and indexed by database
+    :param value: version string
+    :return: version key string
+    """
+    _parts = list()
+
+    for _kind, _rank, _value in parse_version(value):
+        if _kind in [_kind_number, _kind_sub_number]:
+            # numbers have no leading zeroes and are prefixed with their length to be comparable as strings,
+            # the length itself is prefixed with its number of digits, so any length fits
+            _length = str(_rank)
+            _parts.append(f"{_key_prefixes[_kind]}{len(_length)}{_length}{_value}")
+            continue
+
+        if _kind == _kind_qualifier:
+            _parts.append(f"{_key_prefixes[_kind]}{_rank}")
+            continue
+
+        _parts.append(f"{_key_prefixes[_kind]}{_value}")
+
+    return _key_separator.join(_parts)
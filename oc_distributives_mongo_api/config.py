@@ -2,3 +2,7 @@ class Config(object):
     DEBUG = True
     TESTING = False
 
+    # writes of other processes are seen after TTL (seconds) only
+    ARTIFACT_DELIVERABLE_CACHE_SIZE = 10000
+    ARTIFACT_DELIVERABLE_CACHE_TTL = 60
+
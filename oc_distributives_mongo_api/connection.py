@@ -0,0 +1,38 @@
+import os
+import logging
+from time import sleep
+from mongoengine import connect
+
+def connect_from_env():
+    """
+    Connect to MongoDB with settings given in environment:
+    MONGO_URL, MONGO_USER, MONGO_PASSWORD, MONGO_DB, MONGO_CONNECT_ATTEMPTS
+    """
+    _settings = dict()
+
+    for _s in ["url", "user", "password", "db", "connect_attempts"]:
+        _env = "_".join(["mongo", _s]).upper()
+        _v = os.getenv(_env)
+
+        if not _v:
+            raise ValueError("Environment '%s' is not set" % _env)
+
+        _settings[_s] = int(_v) if _s == "connect_attempts" else _v
+
+    _i = 0
+    while True:
+        try:
+            return connect(
+                    _settings["db"],
+                    host=_settings["url"],
+                    username=_settings["user"],
+                    password=_settings["password"],
+                    authentication_source="admin")
+        except Exception as _err:
+            if _i >= _settings["connect_attempts"]:
+                raise
+
+            logging.exception(_err)
+
+            _i += 1
+            sleep(_i)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+"""
+Database maintenance commands for data derived from distributives
+Connection settings are taken from environment, the same as for the service itself
+Example: python3 -m oc_distributives_mongo_api.migrate version_key --workers 8
+"""
+
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pymongo import UpdateOne
+from .connection import connect_from_env
+from .app.dbmodels import Distributives
+from .app.routes import _rebuild_latest, _rebuild_parent_keys, _bump_generations
+from .app.versions import version_key
+
+def rebuild_latest(args):
+    """
+    Rebuild the latest versions collection for all citype-client pairs
+    """
+    _pairs = Distributives.objects.aggregate([
+        {"$group": {"_id": {"citype": "$citype", "client": "$client"}}}])
+    _citypes = set()
+
+    for _pair in _pairs:
+        _citype = _pair.get("_id").get("citype")
+        _client = _pair.get("_id").get("client")
+        _latest = _rebuild_latest(_citype, _client)
+        _citypes.add(_citype)
+        logging.info(f"{_citype}:{_client}: {_latest.version if _latest else 'no actual versions'}")
+
+    _bump_generations(_citypes)
+
+def rebuild_children_count(args):
+    """
+    Recount children of all distributives
+    Should be run while there are no write requests, the counters are maintained by them
+    """
+    _counts = dict((_count.get("_id"), _count.get("count")) for _count in Distributives.objects.aggregate([
+        {"$unwind": "$parent"},
+        {"$group": {"_id": "$parent", "count": {"$sum": 1}}}], allowDiskUse=True))
+
+    # all parents identifiers would not fit a single query, so counters are reset first and set by batches then
+    Distributives.objects(children_count__ne=0).update(children_count=0)
+    _items = list(_counts.items())
+
+    for _start in range(0, len(_items), args.batch_size):
+        Distributives._get_collection().bulk_write([UpdateOne({"_id": _id}, {"$set": {"children_count": _count}})
+            for _id, _count in _items[_start:_start + args.batch_size]], ordered=False)
+
+    _bump_generations(Distributives.objects.distinct("citype"))
+    logging.info(f"Distributives having children: {len(_counts)}")
+
+def _update_version_keys(batch):
+    """
+    Write version keys for a batch of raw documents, those having actual key already are skipped
+    :param batch: list of raw documents with '_id', 'version' and 'version_key'
+    :return: number of documents updated
+    """
+    _requests = list()
+
+    for _distr in batch:
+        _key = version_key(_distr.get("version"))
+
+        if _distr.get("version_key") == _key:
+            continue
+
+        _requests.append(UpdateOne({"_id": _distr.get("_id")}, {"$set": {"version_key": _key}}))
+
+    if not _requests:
+        return 0
+
+    return Distributives._get_collection().bulk_write(_requests, ordered=False).modified_count
+
+def _backfill(fields, update_batch, args):
+    """
+    Read all distributives by batches of '_id' ranges, batches are written in parallel meanwhile
+    Reading is paused while twice as many batches as workers are pending, so memory used is bounded
+    :param fields: fields to load
+    :param update_batch: function writing a batch of raw documents, returns number of documents updated
+    :return: number of documents updated
+    """
+    _total = 0
+    _futures = set()
+    _last_id = None
+
+    with ThreadPoolExecutor(max_workers=args.workers) as _executor:
+        while True:
+            _distrs = Distributives.objects.only(*fields).order_by("id")
+
+            if _last_id:
+                _distrs = _distrs.filter(id__gt=_last_id)
+
+            _batch = list(_distrs.limit(args.batch_size).as_pymongo())
+
+            if not _batch:
+                break
+
+            _last_id = _batch[-1].get("_id")
+            _futures.add(_executor.submit(update_batch, _batch))
+
+            if len(_futures) < args.workers * 2:
+                continue
+
+            _done, _futures = wait(_futures, return_when=FIRST_COMPLETED)
+            _total += sum(map(lambda x: x.result(), _done))
+
+        for _future in _futures:
+            _total += _future.result()
+
+    return _total
+
+def backfill_version_keys(args):
+    """
+    Compute version keys for all distributives, batches are written in parallel
+    """
+    logging.info(f"Version keys updated: {_backfill(['version', 'version_key'], _update_version_keys, args)}")
+    _bump_generations(Distributives.objects.distinct("citype"))
+
+def backfill_parent_keys(args):
+    """
+    Store parents keys for all distributives, batches are written in parallel
+    """
+    logging.info(f"Parent keys updated: {_backfill(['citype', 'parent'], _rebuild_parent_keys, args)}")
+
+def main():
+    _parser = argparse.ArgumentParser(description="Distributives database maintenance")
+    _parser.add_argument("--log-level", dest="log_level", type=int, default=logging.INFO,
+            help="Logging level")
+    _subparsers = _parser.add_subparsers(dest="command", required=True)
+    _subparsers.add_parser("latest", help="Rebuild the latest versions collection").set_defaults(
+            func=rebuild_latest)
+    _children_count_parser = _subparsers.add_parser("children_count", help="Recount children of distributives")
+    _children_count_parser.add_argument("--batch-size", dest="batch_size", type=int, default=1000,
+            help="Number of counters written in a batch")
+    _children_count_parser.set_defaults(func=rebuild_children_count)
+
+    for _command, _help, _func in [
+            ("version_key", "Compute normalized version keys", backfill_version_keys),
+            ("parent_keys", "Store parents keys next to references", backfill_parent_keys)]:
+        _backfill_parser = _subparsers.add_parser(_command, help=_help)
+        _backfill_parser.add_argument("--batch-size", dest="batch_size", type=int, default=1000,
+                help="Number of documents in a batch")
+        _backfill_parser.add_argument("--workers", dest="workers", type=int, default=4,
+                help="Number of batches written in parallel")
+        _backfill_parser.set_defaults(func=_func)
+
+    _args = _parser.parse_args()
+
+    logging.basicConfig(format='[%(asctime)s] [%(levelname)s] %(message)s', level=_args.log_level)
+    connect_from_env()
+    _args.func(_args)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 class UnitTestingConfig(object):
     DEBUG = False
     TESTING = True
+    PARENT_KEYS_RECONCILE_SYNC = True
 
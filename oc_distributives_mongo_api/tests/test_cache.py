@@ -0,0 +1,48 @@
+import unittest
+from ..app.cache import LRUCache
+
+class LRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(2, 10, clock=lambda: self.now)
+
+    # The least recently used entry is evicted
+    def test_eviction(self):
+        self.cache.put("a", 1, 0)
+        self.cache.put("b", 2, 0)
+        self.assertEqual((True, 1, 0), self.cache.get("a"))
+        self.cache.put("c", 3, 0)
+        self.assertEqual((False, None, 0), self.cache.get("b"))
+        self.assertEqual((True, 1, 0), self.cache.get("a"))
+        self.assertEqual((True, 3, 0), self.cache.get("c"))
+        self.assertEqual({"size": 2, "max_size": 2, "ttl": 10, "hits": 3, "misses": 1,
+            "evictions": 1, "expirations": 0, "invalidations": 0}, self.cache.stats())
+
+    # Entries are expired by age, clearing drops all
+    def test_expiration(self):
+        self.cache.put("a", 1, 0)
+        self.now = 5
+        self.cache.put("b", 2, 0)
+        self.now = 10
+        self.assertEqual((False, None, 0), self.cache.get("a"))
+        self.assertEqual((True, 2, 0), self.cache.get("b"))
+        self.cache.clear()
+        self.assertEqual((False, None, 1), self.cache.get("b"))
+        self.assertEqual(1, self.cache.stats().get("expirations"))
+        self.assertEqual(1, self.cache.stats().get("invalidations"))
+
+    # Zero size disables caching
+    def test_disabled(self):
+        _cache = LRUCache(0, 10)
+        _cache.put("a", 1, 0)
+        self.assertEqual((False, None, 0), _cache.get("a"))
+
+    # Value computed before clearing is not cached after it
+    def test_interleaved_clear(self):
+        _found, _value, _epoch = self.cache.get("a")
+        self.assertFalse(_found)
+        self.cache.clear()
+        self.cache.put("a", 1, _epoch)
+        self.assertEqual((False, None, 1), self.cache.get("a"))
+        self.cache.put("a", 2, 1)
+        self.assertEqual((True, 2, 1), self.cache.get("a"))
@@ -2,7 +2,7 @@ import unittest
 import json
 from mongoengine import connect, disconnect
 from ..app import create_app
-from ..app.dbmodels import Distributives, DistributivesRevisions
+from ..app.dbmodels import Distributives, DistributivesRevisions, DistributivesLatest, DistributivesGenerations
 from .config import UnitTestingConfig
 from collections import namedtuple
 from flask import Response
@@ -12,6 +12,7 @@ import os
 import random
 import posixpath
 from copy import deepcopy
+from datetime import datetime, timezone, timedelta
 
 # trick for disabling logger output
 import logging
@@ -31,6 +32,8 @@ class MongoAPITest(unittest.TestCase):
             authentication_source="admin")
 
         DistributivesRevisions.objects.all().delete()
+        DistributivesLatest.objects.all().delete()
+        DistributivesGenerations.objects.all().delete()
         Distributives.objects.all().delete()
 
     def tearDown(self):
@@ -349,6 +352,15 @@ class MongoAPITest(unittest.TestCase):
         _response = self.test_client.post(posixpath.join(posixpath.sep, "add_distributive"), json=_second_distr)
         self.assertEqual(_response.status_code, 400)
 
+    # add with version of wrong type
+    def test_add__version_wrong_type(self):
+        for _version in [1, ["1"], {"1": 1}]:
+            _distr = self._make_distr_json(1)
+            _distr["version"] = _version
+            _response = self.test_client.post(posixpath.join(posixpath.sep, "add_distributive"), json=_distr)
+            self.assertEqual(_response.status_code, 400)
+            self.assertEqual(0, Distributives.objects.count())
+
     # Update distributive - not exist
     def test_update_unexistent(self):
         _changes = {"path": "new.path:new.art:new.vers:new_pkg:new_clsf"}
@@ -2024,6 +2036,599 @@ class MongoAPITest(unittest.TestCase):
                 x.get("version") == _parent.get("version"),
                 x.get("client", "") == _parent.get("client", "")]), _response_for_child.get("parent")))), 1)
 
+    # Get distributives - count, skip and sort
+    def test_get_distributives__count(self):
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json={"count": 1})
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(1, len(_response.json))
+
+        _count = len(_all_distrs) - 1
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json={"count": _count})
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(_count, len(_response.json))
+
+        # sorted, then skip
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"),
+                json={"sort": ["citype", "-version"]})
+        self.assertEqual(_response.status_code, 200)
+        _sorted = list(map(lambda x: (x.get("citype"), x.get("version")), _response.json))
+        self.assertEqual(len(_all_distrs), len(_sorted))
+        self.assertEqual(_sorted, sorted(sorted(_sorted, key=lambda x: x[1], reverse=True), key=lambda x: x[0]))
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"),
+                json={"sort": ["citype", "-version"], "skip": 2, "count": 3})
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(_sorted[2:5], list(map(lambda x: (x.get("citype"), x.get("version")), _response.json)))
+
+        # wrong parameters
+        for _rq in [{"count": -1}, {"count": "1"}, {"skip": -1}, {"sort": "path"}, {"sort": ["citype", 1]},
+                {"page_size": 2, "count": 1}, {"page_size": 2, "sort": "citype"}]:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json=_rq)
+            self.assertEqual(_response.status_code, 400)
+
+    # Get distributives - raw documents are rendered as MongoEngine does
+    def test_get_distributives__raw_rendering(self):
+        _parent = self._make_distr_json(1, citype="TEST01DSTR")
+        _b_parent = self._add_verify_distr(_parent)
+        _child = self._make_distr_json(2, citype="TEST02DSTRCLIENT", client="TEST_CLIENT_02")
+        _child["parent"] = [{"path": _parent.get("path")}]
+        _b_child = self._add_verify_distr(_child)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"))
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(2, len(_response.json))
+
+        for _b_distr in [_b_parent, _b_child]:
+            _expected = json.loads(Distributives.objects.get(id=_b_distr.id).to_json())
+            _distr = list(filter(lambda x: x.get("_id") == _expected.get("_id"), _response.json)).pop()
+            self.assertEqual(len(_expected.pop("parent_keys")), len(_distr.get("parent")))
+            self.assertEqual(len(_expected.pop("parent")), len(_distr.pop("parent")))
+
+            # internal fields are not rendered
+            for _key in ["version_key", "modified"]:
+                self.assertIsNotNone(_expected.pop(_key))
+
+            self.assertEqual(_expected, _distr)
+
+        # and are not accepted for projection
+        for _key in ["version_key", "modified", "parent_keys"]:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json={"fields": [_key]})
+            self.assertEqual(_response.status_code, 400)
+
+    # Write responses - internal fields are not rendered
+    def test_write__internal_fields_hidden(self):
+        _internal = ["version_key", "parent_keys", "modified"]
+        _parent = self._make_distr_json(1, citype="TEST01DSTR")
+        self._add_verify_distr(_parent)
+        _child = self._make_distr_json(2, citype="TEST02DSTRCLIENT", client="TEST_CLIENT_02")
+        _child["parent"] = [{"path": _parent.get("path")}]
+
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "add_distributive"), json=_child)
+        self.assertEqual(201, _response.status_code)
+        self.assertEqual(_child.get("version"), _response.json.get("version"))
+
+        _url = posixpath.join(posixpath.sep, "update_distributive")
+
+        # conflict message
+        _conflict = self.test_client.post(_url, json={"checksum": _parent.get("checksum"),
+            "changes": {"path": _child.get("path")}})
+        self.assertEqual(409, _conflict.status_code)
+
+        for _key in _internal:
+            self.assertNotIn(_key, _conflict.get_data(as_text=True))
+
+        _responses = [
+                self.test_client.post(_url, json={"checksum": _child.get("checksum"), "changes": {"commentary": "new"}}),
+                self.test_client.post(_url, json={"checksum": _child.get("checksum"), "changes": {"commentary": "new"}}),
+                self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"),
+                    json={"citype": _child.get("citype"), "version": _child.get("version"), "client": _child.get("client")})]
+        self.assertEqual([201, 200, 200], list(map(lambda x: x.status_code, _responses)))
+
+        for _response in [_response] + _responses:
+            for _key in _internal:
+                self.assertNotIn(_key, _response.json)
+
+    # Get distributives - parents shared between many children
+    def test_get_distributive__shared_parents(self):
+        _parents = list(map(lambda x: self._make_distr_json(x, citype="TEST%02dDSTR" % x), range(1, 4)))
+
+        for _parent in _parents:
+            self._add_verify_distr(_parent)
+
+        _children = list()
+
+        for _i in range(4, 8):
+            _child = self._make_distr_json(_i, citype="TEST%02dDSTRCLIENT" % _i, client="TEST_CLIENT_%02d" % _i)
+            _child["parent"] = list(map(lambda x: {"checksum": x.get("checksum")}, _parents[:_i % 3 + 1]))
+            self._add_verify_distr(_child)
+            _children.append(_child)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"))
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(len(_parents) + len(_children), len(_response.json))
+
+        for _child in _children:
+            _response_for_child = list(filter(lambda x: x.get("citype") == _child.get("citype"), _response.json)).pop()
+            self.assertEqual(len(_child.get("parent")), len(_response_for_child.get("parent")))
+
+            for _parent in _response_for_child.get("parent"):
+                self.assertEqual(set(_parent.keys()), set(["client", "citype", "version", "path", "checksum"]))
+                self.assertIn({"checksum": _parent.get("checksum").pop()}, _child.get("parent"))
+
+        # parent removed from the database completely is skipped once its children are reconciled
+        _parent_id = Distributives.objects.get(checksum=_parents[0].get("checksum")).pk
+        Distributives.objects(id=_parent_id).delete()
+        routes._reconcile_parent_keys(_parent_id)
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"))
+        self.assertEqual(_response.status_code, 200)
+
+        for _child in _children:
+            _response_for_child = list(filter(lambda x: x.get("citype") == _child.get("citype"), _response.json)).pop()
+            self.assertEqual(len(_child.get("parent")) - 1, len(_response_for_child.get("parent")))
+
+    # Get distributives - parents keys are stored and reconciled on parent change
+    def test_get_distributives__parent_keys(self):
+        _parent = self._make_distr_json(1, citype="TEST01DSTR")
+        self._add_verify_distr(_parent)
+        _child = self._make_distr_json(2, citype="TEST02DSTRCLIENT", client="TEST_CLIENT_02")
+        _child["parent"] = [{"path": _parent.get("path")}]
+        _b_child = self._add_verify_distr(_child)
+        self.assertEqual([[_parent.get("checksum")]], list(map(lambda x: x.get("checksum"), _b_child.parent_keys)))
+
+        _new_checksum = self._md5("new checksum")
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"path": _parent.get("path"), "changes": {"checksum": _new_checksum}})
+        self.assertEqual(201, _response.status_code)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json=
+                {"checksum": _child.get("checksum"), "fields": ["parent"]})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual([[_parent.get("checksum"), _new_checksum]],
+                list(map(lambda x: x.get("checksum"), _response.json[0].get("parent"))))
+        self.assertNotIn("parent_keys", _response.json[0])
+
+        # keys computed for stale references are not written
+        _stale = Distributives.objects(checksum=_child.get("checksum")).only("citype", "parent").as_pymongo().first()
+        Distributives.objects(checksum=_child.get("checksum")).update_one(set__parent=list())
+        self.assertEqual(0, routes._rebuild_parent_keys([_stale]))
+        self.assertEqual([[_parent.get("checksum"), _new_checksum]], list(map(lambda x: x.get("checksum"),
+                Distributives.objects.get(checksum=_child.get("checksum")).parent_keys)))
+
+    # Get single distributive - conditional requests
+    def test_get_distributive__etag(self):
+        _url = posixpath.join(posixpath.sep, "get_distributive")
+        _distr = self._make_distr_json(1)
+        self._add_verify_distr(_distr)
+
+        self.assertEqual(400, self.test_client.get(_url, json={"lazhaa": 1}).status_code)
+        self.assertEqual(404, self.test_client.get(_url, json=
+            {"checksum": self._make_distr_json(2).get("checksum")}).status_code)
+
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_distr.get("version"), _response.json.get("version"))
+        _etag = _response.get_etag()[0]
+        self.assertTrue(_etag)
+
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")},
+                headers={"If-None-Match": f'"{_etag}"'})
+        self.assertEqual(304, _response.status_code)
+        self.assertEqual(_etag, _response.get_etag()[0])
+
+        # any change gives a new tag: appending checksum does not change revision
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _distr.get("checksum"), "changes": {"checksum": self._md5("new checksum")}})
+        self.assertEqual(201, _response.status_code)
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")},
+                headers={"If-None-Match": f'"{_etag}"'})
+        self.assertEqual(200, _response.status_code)
+        self.assertNotEqual(_etag, _response.get_etag()[0])
+        _etag = _response.get_etag()[0]
+
+        # new child changes children count
+        _child = self._make_distr_json(3)
+        _child["parent"] = [{"checksum": _distr.get("checksum")}]
+        self._add_verify_distr(_child)
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")},
+                headers={"If-None-Match": f'"{_etag}"'})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(1, _response.json.get("children_count"))
+
+        # deleted
+        _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"), json=
+                {"path": _distr.get("path")})
+        self.assertEqual(200, _response.status_code)
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")},
+                headers={"If-None-Match": f'"{_etag}"'})
+        self.assertEqual(404, _response.status_code)
+
+    # List requests - conditional requests validated by change generations
+    def test_list_cache_validation(self):
+        _first = self._make_distr_json(1, citype="TEST01DSTR")
+        _second = self._make_distr_json(2, citype="TEST02DSTR")
+        self._add_verify_distr(_first)
+        self._add_verify_distr(_second)
+
+        _requests = [
+                ("get_distributives", None, {"citype": _first.get("citype")}),
+                ("get_versions_by_citype", None, {"citype": _first.get("citype")}),
+                (posixpath.join("versions_by_citype", "all"), {"ci_type": _first.get("citype")}, None),
+                (posixpath.join("versions_by_citype", "latest"), {"ci_type": _first.get("citype")}, None)]
+        _etags = dict()
+
+        for _url, _args, _json in _requests:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, _url), query_string=_args, json=_json)
+            self.assertEqual(200, _response.status_code)
+            self.assertIsNotNone(_response.last_modified)
+            _etags[_url] = _response.get_etag()[0]
+
+            _response = self.test_client.get(posixpath.join(posixpath.sep, _url), query_string=_args, json=_json,
+                    headers={"If-None-Match": f'"{_etags[_url]}"'})
+            self.assertEqual(304, _response.status_code)
+
+        # different requests have different tags
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json=
+                {"citype": _first.get("citype"), "fields": ["version"]})
+        self.assertNotEqual(_etags["get_distributives"], _response.get_etag()[0])
+
+        # change of another citype does not matter
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _second.get("checksum"), "changes": {"commentary": "Another one"}})
+        self.assertEqual(201, _response.status_code)
+
+        for _url, _args, _json in _requests:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, _url), query_string=_args, json=_json,
+                    headers={"If-None-Match": f'"{_etags[_url]}"'})
+            self.assertEqual(304, _response.status_code)
+
+        # but it does for all citypes
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"))
+        self.assertEqual(200, _response.status_code)
+        _etag = _response.get_etag()[0]
+
+        _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"), json=
+                {"path": _second.get("path")})
+        self.assertEqual(200, _response.status_code)
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"),
+                headers={"If-None-Match": f'"{_etag}"'})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(1, len(_response.json))
+
+        # change of the citype requested
+        _child = self._make_distr_json(3, citype="TEST03DSTR")
+        _child["parent"] = [{"checksum": _first.get("checksum")}]
+        self._add_verify_distr(_child)
+
+        for _url, _args, _json in _requests:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, _url), query_string=_args, json=_json,
+                    headers={"If-None-Match": f'"{_etags[_url]}"'})
+            self.assertEqual(200, _response.status_code)
+
+    # List cache validation - a change in the same second is not hidden by 'If-Modified-Since'
+    def test_list_cache_validation__same_second(self):
+        _distr = self._make_distr_json(1, citype="TEST01DSTR")
+        self._add_verify_distr(_distr)
+        _url = posixpath.join(posixpath.sep, "get_distributives")
+        _json = {"citype": _distr.get("citype"), "fields": ["commentary"]}
+
+        _response = self.test_client.get(_url, json=_json)
+        self.assertEqual(200, _response.status_code)
+        _last_modified = _response.headers.get("Last-Modified")
+        self.assertIsNotNone(_last_modified)
+
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _distr.get("checksum"), "changes": {"commentary": "Same second"}})
+        self.assertEqual(201, _response.status_code)
+
+        _response = self.test_client.get(_url, json=_json, headers={"If-Modified-Since": _last_modified})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual("Same second", _response.json[0].get("commentary"))
+
+        # a change in the past seconds is trusted
+        DistributivesGenerations.objects.update(set__modified=datetime.now(timezone.utc) - timedelta(seconds=2))
+        _response = self.test_client.get(_url, json=_json)
+        self.assertEqual(200, _response.status_code)
+        _response = self.test_client.get(_url, json=_json,
+                headers={"If-Modified-Since": _response.headers.get("Last-Modified")})
+        self.assertEqual(304, _response.status_code)
+
+    # Get distributives - cursor pagination
+    def test_get_distributives__pages(self):
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+        _page_size = 2
+        _paged_distrs = list()
+        _rq = {"page_size": _page_size}
+
+        while True:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json=_rq)
+            self.assertEqual(_response.status_code, 200)
+            self.assertEqual(_page_size, _response.json.get("page_size"))
+            _values = _response.json.get("values")
+            self.assertLessEqual(len(_values), _page_size)
+            _paged_distrs.extend(_values)
+
+            if not _response.json.get("next_cursor"):
+                break
+
+            _rq["cursor"] = _response.json.get("next_cursor")
+
+        self.assertEqual(len(_paged_distrs), len(_all_distrs))
+        self.assertEqual(len(set(map(lambda x: x.get("_id").get("$oid"), _paged_distrs))), len(_all_distrs))
+
+        for _distr in _all_distrs:
+            self.assertEqual(1, len(list(filter(lambda x: all([
+                x.get("citype") == _distr.get("citype"),
+                x.get("version") == _distr.get("version"),
+                x.get("client", "") == _distr.get("client", "")]), _paged_distrs))))
+
+        # wrong parameters
+        for _rq in [{"page_size": 0}, {"page_size": "2"}, {"page_size": True}, {"cursor": _rq.get("cursor")},
+                {"page_size": _page_size, "cursor": "lazhaa"}]:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json=_rq)
+            self.assertEqual(_response.status_code, 400)
+
+    # Get distributives and revisions - fields projection
+    def test_get_distributives__fields(self):
+        _parent = self._make_distr_json(1, citype="TEST01DSTR")
+        _child = self._make_distr_json(2, citype="TEST02DSTRCLIENT", client="TEST_CLIENT_02")
+        self._add_verify_distr(_parent)
+        _child["parent"] = [{"checksum": _parent.get("checksum")}]
+        self._add_verify_distr(_child)
+
+        _fields = ["citype", "version", "client", "checksum"]
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json={"fields": _fields})
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(2, len(_response.json))
+
+        for _distr in _response.json:
+            self.assertEqual(set(_distr.keys()), set(["_id"] + _fields))
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"),
+                json={"fields": ["-path", "-commentary"], "citype": _child.get("citype")})
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(1, len(_response.json))
+        _distr = _response.json.pop()
+        self.assertNotIn("path", _distr)
+        self.assertNotIn("commentary", _distr)
+        self.assertEqual(_parent.get("version"), _distr.get("parent")[0].get("version"))
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributive_revisions"),
+                json={"path": _child.get("path"), "fields": ["revision", "commentary"]})
+        self.assertEqual(_response.status_code, 200)
+
+        for _revision in _response.json:
+            self.assertEqual(set(_revision.keys()) - set(["_id"]), set(["revision", "commentary"]))
+
+        # wrong parameters
+        for _fields in ["citype", ["lazhaa"], ["citype", "-path"]]:
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), json={"fields": _fields})
+            self.assertEqual(_response.status_code, 400)
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributive_revisions"),
+                    json={"path": _child.get("path"), "fields": _fields})
+            self.assertEqual(_response.status_code, 400)
+
+    # Get distributives and versions - NDJSON stream
+    def test_get_distributives__ndjson(self):
+        _headers = {"Accept": "application/x-ndjson"}
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_distributives"), headers=_headers)
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(_response.mimetype, "application/x-ndjson")
+        _distrs = list(map(json.loads, _response.get_data(as_text=True).splitlines()))
+        self.assertEqual(len(_all_distrs), len(_distrs))
+
+        for _distr in _all_distrs:
+            self.assertEqual(1, len(list(filter(lambda x: all([
+                x.get("citype") == _distr.get("citype"),
+                x.get("version") == _distr.get("version"),
+                x.get("client", "") == _distr.get("client", "")]), _distrs))))
+
+        _citype = _all_distrs[0].get("citype")
+        _url = posixpath.join(posixpath.sep, "versions_by_citype", "all")
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype}, headers=_headers)
+        self.assertEqual(_response.status_code, 200)
+        self.assertEqual(_response.mimetype, "application/x-ndjson")
+        _versions = list(map(json.loads, _response.get_data(as_text=True).splitlines()))
+        self.assertEqual(_versions, self.test_client.get(_url, query_string={"ci_type": _citype}).json.get("values"))
+
+        _response = self.test_client.get(_url, query_string={"ci_type": "NONEXISTENT"}, headers=_headers)
+        self.assertEqual(_response.status_code, 404)
+
+    # Lookup many distributives by checksums
+    def test_lookup_checksums(self):
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+        _deleted = _all_distrs.pop()
+        _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"),
+                json=dict((_key, _deleted.get(_key)) for _key in ["citype", "version", "client"] if _key in _deleted))
+        self.assertEqual(200, _response.status_code)
+
+        _unknown = self._md5("lazhaa")
+        _checksums = list(map(lambda x: x.get("checksum"), _all_distrs)) + [_deleted.get("checksum"), _unknown]
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "lookup", "checksums"),
+                json={"checksums": _checksums})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(set(_checksums), set(_response.json.keys()))
+        self.assertIsNone(_response.json.get(_unknown))
+        self.assertIsNone(_response.json.get(_deleted.get("checksum")))
+
+        for _distr in _all_distrs:
+            _found = _response.json.get(_distr.get("checksum"))
+            self.assertEqual(_distr.get("citype"), _found.get("citype"))
+            self.assertEqual(_distr.get("version"), _found.get("version"))
+            self.assertEqual(_distr.get("client", ""), _found.get("client"))
+
+        # wrong parameters
+        for _rq in [{"checksums": _unknown}, {"checksums": []}, {"checksums": [1]}, {"path": [_unknown]},
+                {"checksums": [_unknown] * 5001}]:
+            _response = self.test_client.post(posixpath.join(posixpath.sep, "lookup", "checksums"), json=_rq)
+            self.assertEqual(400, _response.status_code)
+
+    # Lookup many distributives by paths
+    def test_lookup_paths(self):
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+        _unknown = "gglazhaa:aalazhaa:0.0.0:pplazhaa"
+        _paths = list(reversed(list(map(lambda x: x.get("path"), _all_distrs))))
+        _paths.insert(1, _unknown)
+        _paths.append(_paths[0])
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "lookup", "paths"), json={"paths": _paths})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(len(_paths), len(_response.json))
+        self.assertIsNone(_response.json[1])
+
+        for _path, _found in zip(_paths, _response.json):
+            if _path == _unknown:
+                continue
+
+            self.assertIn(_path, _found.get("path"))
+
+        # wrong parameters
+        for _rq in [{"paths": _unknown}, {"paths": []}, {"checksums": [_unknown]}]:
+            _response = self.test_client.post(posixpath.join(posixpath.sep, "lookup", "paths"), json=_rq)
+            self.assertEqual(400, _response.status_code)
+
+    # Get distributive revisions - pages and time range
+    def test_distributive_revisions__pages(self):
+        _distr = self._make_distr_json(1)
+        _b_distr = self._add_verify_distr(_distr)
+        _url = posixpath.join(posixpath.sep, "get_distributive_revisions")
+
+        for _i in range(6):
+            _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                    {"checksum": _distr.get("checksum"), "changes": {"commentary": f"Comment {_i}"}})
+            self.assertEqual(201, _response.status_code)
+
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum")})
+        self.assertEqual(200, _response.status_code)
+        _all = list(map(lambda x: x.get("commentary"), _response.json))
+        self.assertEqual(7, len(_all))
+        self.assertEqual("Comment 5", _all[0])
+
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum"), "limit": 2})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_all[:2], list(map(lambda x: x.get("commentary"), _response.json)))
+
+        for _page_size in [1, 3]:
+            _commentaries = list()
+            _request = {"checksum": _distr.get("checksum"), "page_size": _page_size, "fields": ["commentary"]}
+
+            while True:
+                _response = self.test_client.get(_url, json=_request)
+                self.assertEqual(200, _response.status_code)
+                self.assertLessEqual(len(_response.json.get("values")), _page_size)
+                _commentaries += list(map(lambda x: x.get("commentary"), _response.json.get("values")))
+                _request["cursor"] = _response.json.get("next_cursor")
+
+                if not _request["cursor"]:
+                    break
+
+            self.assertEqual(_all, _commentaries)
+
+        # the current state is newer than any revision stored
+        _until = DistributivesRevisions.objects(revision_of=_b_distr).order_by("-timestamp").first().timestamp
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum"),
+            "until": _until.isoformat()})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_all[1:], list(map(lambda x: x.get("commentary"), _response.json)))
+
+        _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum"),
+            "since": _until.isoformat()})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_all[:len(_response.json)], list(map(lambda x: x.get("commentary"), _response.json)))
+        self.assertLess(1, len(_response.json))
+
+        # timestamps with offset are converted to local time
+        _until_utc = _until.astimezone().astimezone(timezone.utc)
+
+        for _value in [_until_utc.isoformat(), _until_utc.isoformat().replace("+00:00", "Z")]:
+            _response = self.test_client.get(_url, json={"checksum": _distr.get("checksum"), "until": _value})
+            self.assertEqual(200, _response.status_code)
+            self.assertEqual(_all[1:], list(map(lambda x: x.get("commentary"), _response.json)))
+
+        # wrong parameters
+        for _rq in [{"limit": 0}, {"limit": 1, "page_size": 1}, {"since": "yesterday"}, {"until": 1},
+                {"page_size": 1, "cursor": "lazhaa"}]:
+            _rq["checksum"] = _distr.get("checksum")
+            self.assertEqual(400, self.test_client.get(_url, json=_rq).status_code)
+
+    # Get revisions of many distributives at once
+    def test_revisions_bulk(self):
+        _url = posixpath.join(posixpath.sep, "revisions", "bulk")
+        _distrs = list(map(self._make_distr_json, range(1, 4)))
+
+        for _distr in _distrs:
+            self._add_verify_distr(_distr)
+
+        for _i in range(3):
+            _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                    {"checksum": _distrs[0].get("checksum"), "changes": {"commentary": f"Comment {_i}"}})
+            self.assertEqual(201, _response.status_code)
+
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _distrs[1].get("checksum"), "changes": {"commentary": "Comment"}})
+        self.assertEqual(201, _response.status_code)
+
+        # bad requests
+        for _rq in [{"distributives": []}, {"distributives": [{"lazhaa": 1}]},
+                {"distributives": [{"checksum": _distrs[0].get("checksum")}], "since": "yesterday"}]:
+            self.assertEqual(400, self.test_client.post(_url, json=_rq).status_code)
+
+        _notfound = {"checksum": self._make_distr_json(4).get("checksum")}
+        _specs = [{"checksum": _distr.get("checksum")} for _distr in _distrs] + [_notfound]
+        _response = self.test_client.post(_url, json={"distributives": _specs, "fields": ["commentary"]})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(4, len(_response.json))
+        self.assertIn({"distributive": _notfound, "revisions": None}, _response.json)
+
+        # each group is the same as the single distributive request gives
+        for _distr in _distrs:
+            _group = list(filter(lambda x: x.get("revisions") is not None and
+                x.get("distributive").get("checksum") == [_distr.get("checksum")], _response.json)).pop()
+            _single = self.test_client.get(posixpath.join(posixpath.sep, "get_distributive_revisions"), json=
+                    {"checksum": _distr.get("checksum"), "fields": ["commentary"]})
+            self.assertEqual(_single.json, _group.get("revisions"))
+
+        # stream
+        _response = self.test_client.post(_url, json={"distributives": _specs},
+                headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(4, len(list(map(json.loads, _response.data.decode("utf8").splitlines()))))
+
+        # timestamps with offset, the stream is complete
+        _since = datetime.now(timezone.utc).isoformat()
+        _response = self.test_client.post(_url, json={"distributives": _specs, "since": _since},
+                headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(200, _response.status_code)
+        _groups = list(map(json.loads, _response.data.decode("utf8").splitlines()))
+        self.assertEqual(4, len(_groups))
+        self.assertEqual([[], [], []],
+                [_group.get("revisions") for _group in _groups if _group.get("revisions") is not None])
+
+        _response = self.test_client.post(_url, json={"distributives": _specs,
+            "until": _since.replace("+00:00", "Z")})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(4, len(_response.json))
+
     # Get distributive revisions - not found
     def test_distributive_revisions__not_found(self):
         _distr = self._make_distr_json(1)
@@ -2312,6 +2917,58 @@ class MongoAPITest(unittest.TestCase):
                         json=dict((_key, _dstr.get(_key)) for _key in ["citype", "version", "client"] if _key in _dstr))
                 self.assertEqual(200, _response.status_code)
 
+    # Get versions by type - sorted by normalized version key
+    def test_get_versions_by_citype__sorted(self):
+        _citype = "TESTSORTDSTR"
+        _versions = ["1.10.0", "1.2", "1.9.1", "1.2-alpha", "01.02.1", "10.0"]
+
+        for _i, _version in enumerate(_versions):
+            _distr = self._make_distr_json(_i, citype=_citype)
+            _distr["version"] = _version
+            _b_distr = self._add_verify_distr(_distr)
+            self.assertIsNotNone(_b_distr.version_key)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_versions_by_citype"), json={"citype": _citype})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(["1.2-alpha", "1.2", "01.02.1", "1.9.1", "1.10.0", "10.0"], _response.json)
+
+    # Get versions by type - versions range
+    def test_get_versions_by_citype__range(self):
+        _citype = "TESTRANGEDSTR"
+        _versions = ["3.1", "3.2", "3.10", "4.0", "4.0.1", "5.0"]
+
+        for _i, _version in enumerate(_versions):
+            _distr = self._make_distr_json(_i, citype=_citype)
+            _distr["version"] = _version
+            self._add_verify_distr(_distr)
+
+        for _range, _expected in [
+                ({"min_version": "3.2", "max_version": "4.0"}, ["3.2", "3.10", "4.0"]),
+                ({"newer_than": "4.0"}, ["4.0.1", "5.0"]),
+                ({"max_version": "3.9"}, ["3.1", "3.2"]),
+                ({"min_version": "6"}, [])]:
+            _rq = {"citype": _citype}
+            _rq.update(_range)
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "get_versions_by_citype"), json=_rq)
+            self.assertEqual(200, _response.status_code)
+            self.assertEqual(_expected, _response.json)
+
+            _rq = {"ci_type": _citype}
+            _rq.update(_range)
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "versions_by_citype", "all"),
+                    query_string=_rq)
+            self.assertEqual(200 if _expected else 404, _response.status_code)
+            self.assertEqual(_expected, list(map(lambda x: x.get("version"), _response.json.get("values"))))
+
+            _response = self.test_client.get(posixpath.join(posixpath.sep, "versions_by_citype", "latest"),
+                    query_string=_rq)
+            self.assertEqual(200 if _expected else 404, _response.status_code)
+            self.assertEqual(_expected[-1:], list(map(lambda x: x.get("version"), _response.json.get("values"))))
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "get_versions_by_citype"),
+                json={"citype": _citype, "min_version": 3})
+        self.assertEqual(400, _response.status_code)
+
     def _check_new_ci_type_api(self, url, params, expected_results=0):
         _response = self.test_client.get(url, query_string=params)
         self.assertEqual(200, _response.status_code)
@@ -2409,6 +3066,116 @@ class MongoAPITest(unittest.TestCase):
                     json=dict((_key, _each_distr.get(_key)) for _key in ["citype", "version", "client"] if _key in _each_distr))
             self.assertEqual(200, _response.status_code)
 
+    # Versions by citypes - all, sorted paths and checksums
+    def test_versions_by_citype__all_sorted(self):
+        _all_distrs = self._make_distr_jsons_for_get_tests()
+        _citypes = sorted(set(map(lambda x: x.get("citype"), _all_distrs)), reverse=True)
+
+        for _distr in _all_distrs:
+            self._add_verify_distr(_distr)
+
+            for _suffix in ["zz", "aa"]:
+                _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json={
+                    "checksum": _distr.get("checksum"), "changes": {
+                        "path": ":".join([_distr.get("path"), _suffix]),
+                        "checksum": self._md5(":".join([_distr.get("path"), _suffix]))}})
+                self.assertEqual(201, _response.status_code)
+
+        # deleted distributive has no paths
+        _deleted = _all_distrs[0]
+        _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"),
+                json=dict((_key, _deleted.get(_key)) for _key in ["citype", "version", "client"] if _key in _deleted))
+        self.assertEqual(200, _response.status_code)
+
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "versions_by_citype", "all"),
+                query_string={"ci_type": _citypes})
+        self.assertEqual(200, _response.status_code)
+        _values = _response.json.get("values")
+        self.assertEqual(len(_all_distrs), len(_values))
+
+        # citypes are in the order requested
+        self.assertEqual(_citypes, list(dict.fromkeys(map(lambda x: x.get("ci_type"), _values))))
+
+        # the stream is in the same order
+        _response = self.test_client.get(posixpath.join(posixpath.sep, "versions_by_citype", "all"),
+                query_string={"ci_type": _citypes}, headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_values, list(map(json.loads, _response.get_data(as_text=True).splitlines())))
+
+        for _value in _values:
+            self.assertEqual(_value.get("paths"), sorted(_value.get("paths")))
+            self.assertEqual(_value.get("checksums"), sorted(_value.get("checksums")))
+
+            if _value.get("ci_type") == _deleted.get("citype") and _value.get("version") == _deleted.get("version"):
+                self.assertEqual([], _value.get("paths"))
+                self.assertEqual(3, len(_value.get("checksums")))
+            else:
+                self.assertEqual(3, len(_value.get("paths")))
+
+    # Versions by citypes - latest is maintained on write
+    def test_versions_by_citype__latest_maintained(self):
+        _citype = "TESTLATESTDSTR"
+        _url = posixpath.join(posixpath.sep, "versions_by_citype", "latest")
+        _distrs = list(map(lambda x: self._make_distr_json(x, citype=_citype), [1, 10, 2]))
+
+        for _distr in _distrs:
+            self._add_verify_distr(_distr)
+
+        # customer-specific versions are counted also
+        _client_distr = self._make_distr_json(3, citype=_citype, client="TEST_CLIENT")
+        self._add_verify_distr(_client_distr)
+        self.assertEqual(2, DistributivesLatest.objects(citype=_citype).count())
+
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_distrs[1].get("version"), _response.json.get("values")[0].get("version"))
+
+        # new path of the latest one
+        _new_path = ":".join([_distrs[1].get("path"), "alternative"])
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json={
+            "checksum": _distrs[1].get("checksum"), "changes": {"path": _new_path}})
+        self.assertEqual(201, _response.status_code)
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype})
+        self.assertIn(_new_path, _response.json.get("values")[0].get("paths"))
+
+        # delete the latest one
+        _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"), json={
+            "citype": _citype, "version": _distrs[1].get("version")})
+        self.assertEqual(200, _response.status_code)
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual(_client_distr.get("version"), _response.json.get("values")[0].get("version"))
+
+        # add it back
+        self._add_verify_distr(_distrs[1])
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype})
+        self.assertEqual(_distrs[1].get("version"), _response.json.get("values")[0].get("version"))
+
+        # version key is stored, so an older version written concurrently does not replace the record
+        _latest = DistributivesLatest.objects.get(citype=_citype, client="")
+        self.assertEqual(Distributives.objects.get(citype=_citype, version=_distrs[1].get("version")).version_key,
+                _latest.version_key)
+        routes._update_latest(Distributives.objects.get(citype=_citype, version=_distrs[2].get("version")))
+        _latest.reload()
+        self.assertEqual(_distrs[1].get("version"), _latest.version)
+
+        # record written without version key is replaced
+        _latest.update(unset__version_key=True)
+        routes._update_latest(Distributives.objects.get(citype=_citype, version=_distrs[2].get("version")))
+        _latest.reload()
+        self.assertEqual(_distrs[2].get("version"), _latest.version)
+        routes._rebuild_latest(_citype, "")
+
+        # delete all
+        for _distr in _distrs + [_client_distr]:
+            _response = self.test_client.delete(posixpath.join(posixpath.sep, "delete_distributive"),
+                    json=dict((_key, _distr.get(_key)) for _key in ["citype", "version", "client"] if _key in _distr))
+            self.assertEqual(200, _response.status_code)
+
+        self.assertEqual(0, DistributivesLatest.objects(citype=_citype).count())
+        _response = self.test_client.get(_url, query_string={"ci_type": _citype})
+        self.assertEqual(404, _response.status_code)
+
     # Check parent loop - add of deleted
     def test_check_parent_loop__add(self):
         # add distributive
@@ -2463,6 +3230,52 @@ class MongoAPITest(unittest.TestCase):
         _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=_params)
         self.assertEqual(409, _response.status_code)
 
+    # parents resolution - duplicates and unknown ones
+    def test_resolve_parents(self):
+        _first_distr = self._make_distr_json(1)
+        _b_first_distr = self._add_verify_distr(_first_distr)
+        _second_distr = self._make_distr_json(2, client="TEST_CLIENT")
+        _b_second_distr = self._add_verify_distr(_second_distr)
+
+        _distr = self._make_distr_json(3)
+        _distr["parent"] = [
+                {"path": _first_distr.get("path")},
+                {"checksum": _first_distr.get("checksum")},
+                dict((_key, _second_distr.get(_key)) for _key in ["citype", "version", "client"]),
+                {"checksum": self._make_distr_json(4).get("checksum")},
+                {"citype": _first_distr.get("citype")},
+                {"lazhaa": 1}]
+        _b_distr = self._add_verify_distr(_distr)
+        self.assertCountEqual([_b_first_distr.pk, _b_second_distr.pk], [_parent.pk for _parent in _b_distr.parent])
+
+    # check parent loop - shared ancestors
+    def test_check_parent_loop__diamonds(self):
+        # a stack of diamonds: each level has two distributives with both of previous level as parents
+        _first_distr = self._make_distr_json(1)
+        self._add_verify_distr(_first_distr)
+        _level = [_first_distr]
+
+        for _arg in range(2, 22, 2):
+            _distrs = [self._make_distr_json(_arg), self._make_distr_json(_arg + 1)]
+
+            for _distr in _distrs:
+                _distr["parent"] = [{"checksum": _parent.get("checksum")} for _parent in _level]
+                self._add_verify_distr(_distr)
+
+            _level = _distrs
+
+        # first can not be a child of the last level
+        _params = {"checksum": _first_distr.get("checksum"),
+                "changes": {"parent":[{"checksum": _level[0].get("checksum")}]}}
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=_params)
+        self.assertEqual(409, _response.status_code)
+
+        # but the other one of the last level can
+        _params = {"checksum": _level[1].get("checksum"),
+                "changes": {"parent":[{"checksum": _level[0].get("checksum")}]}}
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=_params)
+        self.assertEqual(201, _response.status_code)
+
     # Check deliverability
     def test_artifact_deliverable(self):
         # ask for distr not exist
@@ -2517,4 +3330,243 @@ class MongoAPITest(unittest.TestCase):
                 {"checksum": _child.get("checksum")})
         self.assertFalse(_response.json.pop())
 
+    def test_artifact_deliverable__cache(self):
+        _url = posixpath.join(posixpath.sep, "artifact_deliverable")
+        _stats_url = posixpath.join(posixpath.sep, "artifact_deliverable", "cache")
+        _parent = self._make_distr_json(1)
+        self._add_verify_distr(_parent)
+        _child = self._make_distr_json(2)
+        _child["parent"] = [{"checksum": _parent.get("checksum")}]
+        self._add_verify_distr(_child)
+
+        for _i in range(3):
+            _response = self.test_client.get(_url, json={"checksum": _child.get("checksum")})
+            self.assertTrue(_response.json.pop())
+
+        _stats = self.test_client.get(_stats_url).json
+        self.assertEqual(1, _stats.get("misses"))
+        self.assertEqual(2, _stats.get("hits"))
+        self.assertEqual(1, _stats.get("size"))
+
+        # transitive check is cached separately
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True})
+        self.assertTrue(_response.json.get("artifact_deliverable"))
+        self.assertEqual(2, self.test_client.get(_stats_url).json.get("size"))
+
+        # parent change invalidates the child verdict
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _parent.get("checksum"), "changes":
+                {"artifact_deliverable": False, "commentary": "Test Roach Bug found"}})
+        self.assertEqual(201, _response.status_code)
+        self.assertEqual(0, self.test_client.get(_stats_url).json.get("size"))
+
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum")})
+        self.assertFalse(_response.json.pop())
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True})
+        self.assertFalse(_response.json.get("artifact_deliverable"))
+
+    def test_artifact_deliverable__transitive(self):
+        # chain of three: grandparent <- parent <- child
+        _url = posixpath.join(posixpath.sep, "artifact_deliverable")
+        _grandparent = self._make_distr_json(1)
+        self._add_verify_distr(_grandparent)
+        _parent = self._make_distr_json(2)
+        _parent["parent"] = [{"checksum": _grandparent.get("checksum")}]
+        self._add_verify_distr(_parent)
+        _child = self._make_distr_json(3)
+        _child["parent"] = [{"checksum": _parent.get("checksum")}]
+        self._add_verify_distr(_child)
+
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual({"artifact_deliverable": True, "blocked_by": None}, _response.json)
+
+        # incorrect depth
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True,
+            "max_depth": 0})
+        self.assertEqual(400, _response.status_code)
+
+        # incorrect flag
+        for _transitive in ["false", "0", 1]:
+            _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": _transitive})
+            self.assertEqual(400, _response.status_code)
+
+        # deny grandparent: the direct check does not see it, transitive one does
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _grandparent.get("checksum"), "changes":
+                {"artifact_deliverable": False, "commentary": "Test Roach Bug found"}})
+        self.assertEqual(201, _response.status_code)
+
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum")})
+        self.assertTrue(_response.json.pop())
+
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True})
+        self.assertEqual(200, _response.status_code)
+        self.assertFalse(_response.json.get("artifact_deliverable"))
+        self.assertEqual(2, _response.json.get("blocked_by").get("depth"))
+        self.assertEqual([_grandparent.get("checksum")], _response.json.get("blocked_by").get("checksum"))
+
+        _response = self.test_client.get(_url, json={"checksum": _child.get("checksum"), "transitive": True,
+            "max_depth": 1})
+        self.assertEqual({"artifact_deliverable": True, "blocked_by": None}, _response.json)
+
+        # the distributive itself blocks first
+        _response = self.test_client.get(_url, json={"checksum": _grandparent.get("checksum"), "transitive": True})
+        self.assertFalse(_response.json.get("artifact_deliverable"))
+        self.assertEqual(0, _response.json.get("blocked_by").get("depth"))
+
+    def test_graph(self):
+        # diamond: root <- (left, right) <- bottom
+        _root = self._make_distr_json(1)
+        self._add_verify_distr(_root)
+        _left = self._make_distr_json(2)
+        _left["parent"] = [{"checksum": _root.get("checksum")}]
+        self._add_verify_distr(_left)
+        _right = self._make_distr_json(3)
+        _right["parent"] = [{"checksum": _root.get("checksum")}]
+        self._add_verify_distr(_right)
+        _bottom = self._make_distr_json(4)
+        _bottom["parent"] = [{"checksum": _left.get("checksum")}, {"checksum": _right.get("checksum")}]
+        self._add_verify_distr(_bottom)
+
+        _ancestors_url = posixpath.join(posixpath.sep, "graph", "ancestors")
+        _descendants_url = posixpath.join(posixpath.sep, "graph", "descendants")
+
+        # bad requests and not found
+        self.assertEqual(400, self.test_client.get(_ancestors_url, json={"lazhaa": 1}).status_code)
+        self.assertEqual(400, self.test_client.get(_ancestors_url, json={"checksum": _bottom.get("checksum"),
+            "max_depth": 0}).status_code)
+        self.assertEqual(404, self.test_client.get(_ancestors_url, json=
+            {"checksum": self._make_distr_json(5).get("checksum")}).status_code)
+
+        # each relative is given once with the shortest depth
+        _response = self.test_client.get(_ancestors_url, json={"checksum": _bottom.get("checksum")})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual({_left.get("version"): 1, _right.get("version"): 1, _root.get("version"): 2},
+                dict((_distr.get("version"), _distr.get("depth")) for _distr in _response.json))
+        self.assertIn({"citype": _root.get("citype"), "version": _root.get("version"), "client": "",
+            "path": [_root.get("path")], "checksum": [_root.get("checksum")]}, _response.json[0].get("parent")
+            + _response.json[1].get("parent") + _response.json[2].get("parent"))
+
+        _response = self.test_client.get(_descendants_url, json={"checksum": _root.get("checksum"),
+            "max_depth": 1, "fields": ["version"]})
+        self.assertEqual(200, _response.status_code)
+        self.assertCountEqual([{"version": _left.get("version"), "depth": 1},
+            {"version": _right.get("version"), "depth": 1}],
+            list(map(lambda x: dict((_key, x.get(_key)) for _key in x if _key != "_id"), _response.json)))
+
+        # pages
+        _versions = list()
+        _cursor = None
+
+        while True:
+            _request = {"checksum": _root.get("checksum"), "page_size": 2, "fields": ["version"]}
+
+            if _cursor:
+                _request["cursor"] = _cursor
+
+            _response = self.test_client.get(_descendants_url, json=_request)
+            self.assertEqual(200, _response.status_code)
+            self.assertLessEqual(len(_response.json.get("values")), 2)
+            _versions += list(map(lambda x: x.get("version"), _response.json.get("values")))
+            _cursor = _response.json.get("next_cursor")
+
+            if not _cursor:
+                break
+
+        self.assertCountEqual([_left.get("version"), _right.get("version"), _bottom.get("version")], _versions)
+
+    def test_children(self):
+        _parents = [self._make_distr_json(1), self._make_distr_json(2)]
+
+        for _parent in _parents:
+            self._add_verify_distr(_parent)
+
+        _children = list()
+
+        for _arg in range(3, 8):
+            _child = self._make_distr_json(_arg)
+            _child["parent"] = [{"checksum": _parents[0].get("checksum")}]
+            self._add_verify_distr(_child)
+            _children.append(_child)
+
+        _url = posixpath.join(posixpath.sep, "children")
+        self.assertEqual(5, Distributives.objects.get(checksum=_parents[0].get("checksum")).children_count)
+        self.assertEqual(400, self.test_client.get(_url, json={"lazhaa": 1}).status_code)
+        self.assertEqual(404, self.test_client.get(_url, json=
+            {"checksum": self._make_distr_json(8).get("checksum")}).status_code)
+
+        # move one child to another parent
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _children[0].get("checksum"), "changes":
+                {"parent": [{"checksum": _parents[1].get("checksum")}]}})
+        self.assertEqual(201, _response.status_code)
+        self.assertEqual([4, 1], list(map(lambda x: Distributives.objects.get(
+            checksum=x.get("checksum")).children_count, _parents)))
+
+        _response = self.test_client.get(_url, json={"checksum": _parents[1].get("checksum")})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual([_children[0].get("version")], list(map(lambda x: x.get("version"), _response.json)))
+
+        # pages
+        _versions = list()
+        _request = {"checksum": _parents[0].get("checksum"), "page_size": 3, "fields": ["version"]}
+
+        while True:
+            _response = self.test_client.get(_url, json=_request)
+            self.assertEqual(200, _response.status_code)
+            _versions += list(map(lambda x: x.get("version"), _response.json.get("values")))
+            _request["cursor"] = _response.json.get("next_cursor")
+
+            if not _request["cursor"]:
+                break
+
+        self.assertCountEqual(list(map(lambda x: x.get("version"), _children[1:])), _versions)
+
+    def test_artifact_deliverable__bulk(self):
+        # bad requests
+        _url = posixpath.join(posixpath.sep, "artifact_deliverable", "bulk")
+        self.assertEqual(400, self.test_client.post(_url, json={"distributives": []}).status_code)
+        self.assertEqual(400, self.test_client.post(_url, json={"distributives": [{"lazhaa": 1}]}).status_code)
+        self.assertEqual(400, self.test_client.post(_url, json={"distributives": [{"citype": "TSTDSTR"}]}).status_code)
+
+        # one deliverable parent, one not deliverable child of it, one deliverable and one not existing
+        _parent = self._make_distr_json(1)
+        self._add_verify_distr(_parent)
+        _child = self._make_distr_json(2, client="TEST_CLIENT")
+        _child["parent"] = [{"checksum": _parent.get("checksum")}]
+        self._add_verify_distr(_child)
+        _other = self._make_distr_json(3)
+        self._add_verify_distr(_other)
+        _absent = self._make_distr_json(4)
+
+        _specs = [
+                {"path": _parent.get("path")},
+                {"checksum": _child.get("checksum")},
+                dict((_key, _other.get(_key)) for _key in ["citype", "version"]),
+                {"checksum": _absent.get("checksum")}]
+        _response = self.test_client.post(_url, json={"distributives": _specs})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual([True, True, True, True], _response.json)
+
+        # search values not acceptable by database
+        _response = self.test_client.post(_url, json={"distributives": [
+            {"citype": _parent.get("citype"), "version": {"$lazhaa": 1}}]})
+        self.assertEqual(400, _response.status_code)
+        self.assertIn("Search error", _response.get_data(as_text=True))
+
+        _response = self.test_client.post(posixpath.join(posixpath.sep, "update_distributive"), json=
+                {"checksum": _parent.get("checksum"), "changes":
+                {"artifact_deliverable": False, "commentary": "Test Roach Bug found"}})
+        self.assertEqual(201, _response.status_code)
+
+        # verdicts are in the same order as requested and the same as single requests give
+        _response = self.test_client.post(_url, json={"distributives": _specs})
+        self.assertEqual(200, _response.status_code)
+        self.assertEqual([False, False, True, True], _response.json)
+
+        for _spec, _verdict in zip(_specs, _response.json):
+            self.assertEqual([_verdict], self.test_client.get(
+                posixpath.join(posixpath.sep, "artifact_deliverable"), json=_spec).json)
+
 
@@ -0,0 +1,52 @@
+import unittest
+import random
+from ..app.versions import parse_version, version_key
+
+class VersionsTest(unittest.TestCase):
+    _ordered = [
+            "1.0-alpha", "1.0-alpha-1", "1.0-b2", "1.0-milestone-1", "1.0-rc1", "1.0-SNAPSHOT",
+            "1.0", "1.0-sp1", "1.0-xyz", "1.0.1", "1.1", "1.9.1", "1.10", "2.0-beta", "10.0", "100.00.101"]
+
+    # Versions ordering by parsed keys and by string keys is the same
+    def test_ordering(self):
+        _versions = self._ordered.copy()
+
+        for _i in range(0, 5):
+            random.shuffle(_versions)
+            self.assertEqual(self._ordered, sorted(_versions, key=parse_version))
+            self.assertEqual(self._ordered, sorted(_versions, key=version_key))
+
+    # Trailing zeroes and release qualifiers are insignificant
+    def test_equal(self):
+        for _versions in [
+                ["1", "1.0", "1.0.0", "1-ga", "1.0-final", "1.0.RELEASE"],
+                ["1-alpha", "1.0-alpha", "1.0.0-alpha"],
+                ["1.2-rc1", "1.2-cr-1", "1.2.0-RC1"],
+                ["01.002", "1.2"]]:
+            self.assertEqual(1, len(set(map(parse_version, _versions))), _versions)
+            self.assertEqual(1, len(set(map(version_key, _versions))), _versions)
+
+    # Numbers after a hyphen are sub-versions, lower than the same numbers after a dot
+    def test_sub_versions(self):
+        for _lower, _greater in [("1-1", "1.1"), ("1.0-1", "1.0.1"), ("1", "1-1"), ("1-sp", "1-1"), ("1-1", "1-2")]:
+            self.assertLess(parse_version(_lower), parse_version(_greater), _lower)
+            self.assertLess(version_key(_lower), version_key(_greater), _lower)
+
+        self.assertEqual(version_key("1-1"), version_key("1.0-1"))
+
+    # Numbers of any length are ordered by string keys
+    def test_long_numbers(self):
+        _versions = ["1." + "9" * 99, "1.1" + "0" * 99, "1.1" + "0" * 999, "1.1" + "0" * 9999]
+        self.assertEqual(_versions, sorted(reversed(_versions), key=version_key))
+
+    # Short qualifiers are recognized when followed by a number only
+    def test_short_qualifiers(self):
+        self.assertEqual(parse_version("1.0-a1"), parse_version("1.0-alpha-1"))
+        self.assertEqual(parse_version("1.0-m2"), parse_version("1.0-milestone-2"))
+        self.assertGreater(parse_version("1.0-a"), parse_version("1.0"))
+
+    # Only ASCII digits and letters are version tokens, others are separators
+    def test_non_ascii(self):
+        for _version in ["1.²", "1.٣", "1.é"]:
+            self.assertEqual(parse_version("1"), parse_version(_version), _version)
+            self.assertEqual(version_key("1"), version_key(_version), _version)
@@ -18,8 +18,7 @@ setup(name="oc-distributives-mongo-api",
           "mongoengine >= 0.23",
           "Werkzeug == 2.0.3",
           "flask == 2.0.3",
-          "gunicorn",
-          "packaging >= 21.0"
+          "gunicorn"
       ],
 
       packages=["oc_distributives_mongo_api"],